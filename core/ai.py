@@ -1379,6 +1379,10 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
     if pat:
         headers["Authorization"] = f"token {pat}"
     
+    # One keep-alive session for the README, listing and every file download below,
+    # so each request after the first skips the TCP/TLS handshake
+    http = requests.Session()
+    
     try:
         # Fetch README (from root or subpath, with ref if specified)
         if subpath:
@@ -1386,7 +1390,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
         else:
             readme_url = f"https://api.github.com/repos/{owner}/{repo}/readme{ref_query}"
         logger.info(f"[GitHub] Fetching README from: {readme_url}")
-        readme_resp = requests.get(readme_url, headers=headers, timeout=10)
+        readme_resp = http.get(readme_url, headers=headers, timeout=10)
         logger.info(f"[GitHub] README response: {readme_resp.status_code}")
         
         if readme_resp.status_code == 200:
@@ -1411,7 +1415,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
         else:
             contents_url = f"https://api.github.com/repos/{owner}/{repo}/contents{ref_query}"
         logger.info(f"[GitHub] Fetching contents from: {contents_url}")
-        contents_resp = requests.get(contents_url, headers=headers, timeout=10)
+        contents_resp = http.get(contents_url, headers=headers, timeout=10)
         logger.info(f"[GitHub] Contents response: {contents_resp.status_code}")
         
         if contents_resp.status_code == 200:
@@ -1456,7 +1460,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 if ext == '.zip':
                     try:
                         logger.debug(f"[ZIP DEBUG] Downloading ZIP from GitHub: {fname} ({file_size} bytes)")
-                        zip_resp = requests.get(download_url, timeout=30)
+                        zip_resp = http.get(download_url, timeout=30)
                         if zip_resp.status_code == 200:
                             import io
                             import zipfile
@@ -1481,7 +1485,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 # Download PDF files and extract text/images
                 elif ext == '.pdf':
                     try:
-                        pdf_resp = requests.get(download_url, timeout=30)
+                        pdf_resp = http.get(download_url, timeout=30)
                         if pdf_resp.status_code == 200:
                             pdf_bytes = pdf_resp.content
                             
@@ -1499,7 +1503,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 elif ext in ['.docx', '.doc'] and file_size < 10 * 1024 * 1024:  # Up to 10MB
                     try:
                         logger.debug(f"[GitHub] Downloading DOCX: {fname} from {download_url}")
-                        docx_resp = requests.get(download_url, timeout=30)
+                        docx_resp = http.get(download_url, timeout=30)
                         if docx_resp.status_code == 200:
                             docx_bytes = docx_resp.content
                             
@@ -1528,7 +1532,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                              '.r', '.scala', '.kt', '.swift', '.m', '.pl', '.lua', '.dart'] and file_size < 50000:
                     try:
                         logger.debug(f"[GitHub] Downloading text file: {fname} from {download_url}")
-                        txt_resp = requests.get(download_url, timeout=10)
+                        txt_resp = http.get(download_url, timeout=10)
                         if txt_resp.status_code == 200:
                             text_content = txt_resp.text[:15000]  # Increased from 10K to 15K
                             result["file_contents"].append(f"--- {fname} ---\n{text_content}")
@@ -1541,7 +1545,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 # Download image files for multimodal AI
                 elif ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'] and file_size < 5 * 1024 * 1024:
                     try:
-                        img_resp = requests.get(download_url, timeout=15)
+                        img_resp = http.get(download_url, timeout=15)
                         if img_resp.status_code == 200:
                             # Resize image to save tokens
                             try:
@@ -1557,7 +1561,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 # Download PCAP/PCAPNG files and extract summary
                 elif ext in ['.pcap', '.pcapng'] and file_size < 10 * 1024 * 1024:
                     try:
-                        pcap_resp = requests.get(download_url, timeout=30)
+                        pcap_resp = http.get(download_url, timeout=30)
                         if pcap_resp.status_code == 200:
                             pcap_summary = extract_pcapng_summary(pcap_resp.content, fname)
                             result["file_contents"].append(f"--- {fname} (Network Capture) ---\n{pcap_summary}")
@@ -1595,7 +1599,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                 
                 dir_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{dir_path}"
                 try:
-                    dir_resp = requests.get(dir_url, headers=headers, timeout=10)
+                    dir_resp = http.get(dir_url, headers=headers, timeout=10)
                     if dir_resp.status_code != 200:
                         return
                     
@@ -1624,7 +1628,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                             
                             elif df_url and df_size < 50000 and df_ext in CODE_EXTENSIONS:
                                 try:
-                                    sub_resp = requests.get(df_url, timeout=10)
+                                    sub_resp = http.get(df_url, timeout=10)
                                     if sub_resp.status_code == 200:
                                         text_content = sub_resp.text[:15000]
                                         result["file_contents"].append(f"--- {df_path} ---\n{text_content}")
@@ -1634,7 +1638,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                             # Also download images from subdirectories for multimodal AI
                             elif df_url and df_ext in ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'] and df_size < 5 * 1024 * 1024:
                                 try:
-                                    img_resp = requests.get(df_url, timeout=15)
+                                    img_resp = http.get(df_url, timeout=15)
                                     if img_resp.status_code == 200:
                                         # Resize image to save tokens
                                         try:
@@ -1651,7 +1655,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                             # Download DOCX files from subdirectories
                             elif df_url and df_ext in ['.docx', '.doc'] and df_size < 10 * 1024 * 1024:
                                 try:
-                                    docx_resp = requests.get(df_url, timeout=30)
+                                    docx_resp = http.get(df_url, timeout=30)
                                     if docx_resp.status_code == 200:
                                         docx_bytes = docx_resp.content
                                         if len(docx_bytes) >= 2 and docx_bytes[:2] == b'PK':
@@ -1666,7 +1670,7 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
                             # Download PDF files from subdirectories
                             elif df_url and df_ext == '.pdf' and df_size < 10 * 1024 * 1024:
                                 try:
-                                    pdf_resp = requests.get(df_url, timeout=30)
+                                    pdf_resp = http.get(df_url, timeout=30)
                                     if pdf_resp.status_code == 200:
                                         pdf_bytes = pdf_resp.content
                                         pdf_text = extract_pdf_text(pdf_bytes, max_chars=15000)
@@ -1718,6 +1722,8 @@ def fetch_github_content(repo_url: str, pat: Optional[str] = None) -> Dict[str,
         result["error"] = f"Network error: {str(e)}"
     except Exception as e:
         result["error"] = f"Error fetching GitHub content: {str(e)}"
+    finally:
+        http.close()
     
     return result
 
@@ -2127,10 +2133,14 @@ def fetch_submission_content(row: Dict, course_id: int = None) -> Dict[str, Any]
     
     # Parse submission files if it's a string
     if isinstance(submission_files, str) and submission_files.startswith('['):
+        # Try the C JSON parser first; Python reprs fall back to literal_eval
         try:
-            submission_files = ast.literal_eval(submission_files)
-        except:
-            submission_files = []
+            submission_files = json.loads(submission_files)
+        except ValueError:
+            try:
+                submission_files = ast.literal_eval(submission_files)
+            except Exception:
+                submission_files = []
     
     # Determine type if not set
     if not submission_type:
@@ -3,12 +3,18 @@ Evaluation tab for Streamlit app.
 Handles submission evaluation and detailed analysis.
 """
 
+import ast
+import hashlib
+import html
+import json
 import logging
+import re
 import time
+import zipfile
+from datetime import datetime
 from pathlib import Path
 import pandas as pd
 import streamlit as st
-import ast
 
 from core.api import evaluate_submission, download_file, get_assignment_dates, submit_grade, get_fresh_sesskey
 from core.auth import setup_session
@@ -18,7 +24,8 @@ from streamlit_modules.ui.components import format_timestamp
 from streamlit_modules.ui.content_viewer import (
     render_docx_viewer, render_pdf_viewer, render_pdf_content, render_html_viewer,
     IMAGE_EXTENSIONS, LANGUAGE_MAP, HTML_EXTENSIONS, render_code_content, render_image_content,
-    detect_file_type
+    detect_file_type, MAGIC_SNIFF_BYTES, b64encode_str, safe_student_dirname, safe_download_filename,
+    render_github_viewer, get_max_inline_size
 )
 
 logger = logging.getLogger(__name__)
@@ -121,11 +128,11 @@ def _render_submission_override(row, course):
             if uploaded_file and st.button("✅ Apply Upload", 
                                            key=f"apply_file_override_{module_id}_{hash(student_name)}"):
                 # Save the file to disk
-                safe_student = "".join([c for c in student_name if c.isalnum() or c in (' ', '-', '_')]).strip()
+                safe_student = safe_student_dirname(student_name)
                 download_dir = Path(f"output/course_{course['id']}/downloads/{safe_student}")
                 download_dir.mkdir(parents=True, exist_ok=True)
                 
-                safe_filename = "".join([c for c in uploaded_file.name if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+                safe_filename = safe_download_filename(uploaded_file.name)
                 file_path = download_dir / safe_filename
                 
                 with open(file_path, 'wb') as f:
@@ -163,9 +170,15 @@ def get_display_dataframe(data):
 def _parse_submission_files(submission_files):
     """Safely parse submission files string to list"""
     if isinstance(submission_files, str) and submission_files.startswith('['):
+        # JSON lists parse in C; Python reprs (lists of tuples from CSV) fail
+        # on the first tuple and fall back to literal_eval
+        try:
+            return json.loads(submission_files)
+        except ValueError:
+            pass
         try:
             return ast.literal_eval(submission_files)
-        except:
+        except Exception:
             return []
     return submission_files if isinstance(submission_files, list) else []
 
@@ -191,13 +204,13 @@ def _check_unfetched_files(course_id, data):
             continue
         
         student_name = row.get('Name', 'Unknown')
-        safe_student = "".join([c for c in student_name if c.isalnum() or c in (' ', '-', '_')]).strip()
+        safe_student = safe_student_dirname(student_name)
         
         missing_files = []
         for f in submission_files:
             fname = f[0] if isinstance(f, (list, tuple)) else str(f)
             furl = f[1] if isinstance(f, (list, tuple)) and len(f) > 1 else None
-            safe_filename = "".join([c for c in fname if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+            safe_filename = safe_download_filename(fname)
             local_path = Path(f"output/course_{course_id}/downloads/{safe_student}/{safe_filename}")
             
             if not local_path.exists():
@@ -482,11 +495,48 @@ def render_evaluation_tab(course, meta):
     _render_ai_scoring_section(course, row, idx, data)
 
 
+# "Open in Browser" button for the PDF preview. Static, so it is not rebuilt
+# around each PDF; the document is read from the #pdf-src anchor. Browsers
+# block top-level navigation to data: URLs, so when the component loads the
+# base64 is decoded into a Blob and its URL becomes the href of a real
+# target=_blank link. The click is then an ordinary link navigation that
+# popup blockers allow, with no async step between the gesture and the open.
+_PDF_OPEN_BUTTON_HTML = """
+<a id="pdf-open" target="_blank" rel="noopener"
+   style="display: block; box-sizing: border-box; width: 100%; padding: 0.4rem;
+          background-color: #262730; color: white; text-align: center;
+          text-decoration: none; font-family: sans-serif;
+          border-radius: 0.5rem; cursor: pointer;
+          border: 1px solid #444;">👁️ Open in Browser</a>
+<script>
+    (function() {
+        const b64 = document.getElementById('pdf-src').getAttribute('href').split(',', 2)[1];
+        const bin = atob(b64);
+        const bytes = new Uint8Array(bin.length);
+        for (let i = 0; i < bin.length; i++) {
+            bytes[i] = bin.charCodeAt(i);
+        }
+        document.getElementById('pdf-open').href =
+            URL.createObjectURL(new Blob([bytes], {type: 'application/pdf'}));
+    })();
+</script>
+"""
+
+
+@st.cache_data(show_spinner=False, max_entries=16, ttl=300)
+def _load_pdf_for_view(path_str, mtime_ns, size):
+    """Read a local PDF once for the View and Download buttons.
+
+    mtime_ns and size are only part of the cache key so a re-downloaded
+    file is picked up; reruns of the same preview reuse the cached bytes.
+    Callers only pass PDFs within get_max_inline_size(), like
+    content_viewer's _cached_file_bytes.
+    """
+    return Path(path_str).read_bytes()
+
+
 def _render_file_submission(course, row, idx):
     """Render file submission with file explorer + preview pattern"""
-    import hashlib
-    import base64
-    from datetime import datetime
     
     submission_files = _parse_submission_files(row.get('Submission_Files'))
     
@@ -495,13 +545,13 @@ def _render_file_submission(course, row, idx):
         return
     
     # Build file list data
-    safe_student = "".join([c for c in row.get('Name', 'Unknown') if c.isalnum() or c in (' ', '-', '_')]).strip()
+    safe_student = safe_student_dirname(row.get('Name', 'Unknown'))
     
     file_list = []
     file_paths = {}  # Map index to path for preview
     
     for i, (fname, furl) in enumerate(submission_files):
-        safe_filename = "".join([c for c in fname if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+        safe_filename = safe_download_filename(fname)
         local_path = Path(f"output/course_{course['id']}/downloads/{safe_student}/{safe_filename}")
         
         file_info = {
@@ -534,7 +584,6 @@ def _render_file_submission(course, row, idx):
     # === SECTION 1: File List Table ===
     st.markdown("#### 📂 Submitted Files")
     
-    import pandas as pd
     df = pd.DataFrame(file_list)
     
     # Display with selection
@@ -635,38 +684,48 @@ def _render_file_submission(course, row, idx):
         if local_path and Path(local_path).exists():
             path = Path(local_path)
             
+            is_pdf = fname.lower().endswith('.pdf')
+            pdf_data = None
+            if is_pdf:
+                stat = path.stat()
+                # Larger PDFs are neither cached nor embedded in the page
+                if stat.st_size <= get_max_inline_size():
+                    pdf_data = _load_pdf_for_view(str(path), stat.st_mtime_ns, stat.st_size)
+            
             with col2:
                 # View in browser button for PDFs
-                if fname.lower().endswith('.pdf'):
-                    with open(path, "rb") as f:
-                        pdf_data = f.read()
-                    b64_pdf = base64.b64encode(pdf_data).decode('utf-8')
-                    view_html = f'''
-                        <button onclick="openPdf()" style="width: 100%; padding: 0.4rem; 
-                               background-color: #262730; color: white;
-                               border-radius: 0.5rem; cursor: pointer;
-                               border: 1px solid #444;">👁️ Open in Browser</button>
-                        <script>
-                            function openPdf() {{
-                                const binary = atob("{b64_pdf}");
-                                const bytes = new Uint8Array(binary.length);
-                                for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
-                                window.open(URL.createObjectURL(new Blob([bytes], {{type:'application/pdf'}})), '_blank');
-                            }}
-                        </script>
-                    '''
+                if pdf_data is not None:
+                    # The PDF travels as a data: URL on a hidden anchor; the static
+                    # script turns it into a Blob URL for the link when it loads
+                    view_html = (
+                        f'<a id="pdf-src" href="data:application/pdf;base64,{b64encode_str(pdf_data)}" hidden></a>'
+                        + _PDF_OPEN_BUTTON_HTML
+                    )
                     st.components.v1.html(view_html, height=40)
+                elif is_pdf:
+                    st.caption("Too large to open inline - use Download")
             
             with col3:
-                with open(path, "rb") as f:
+                if pdf_data is not None:
+                    # Reuse the bytes already read for the View button
                     st.download_button(
                         label="📥 Download",
-                        data=f,
+                        data=pdf_data,
                         file_name=fname,
                         mime="application/octet-stream",
                         key=f"dl_preview_{idx}_{selected_file_idx}",
                         width="stretch"
                     )
+                else:
+                    with open(path, "rb") as f:
+                        st.download_button(
+                            label="📥 Download",
+                            data=f,
+                            file_name=fname,
+                            mime="application/octet-stream",
+                            key=f"dl_preview_{idx}_{selected_file_idx}",
+                            width="stretch"
+                        )
             
             # === Preview Pane ===
             st.markdown("#### 👁️ Preview")
@@ -715,15 +774,21 @@ def _render_file_submission(course, row, idx):
             
             elif ext in LANGUAGE_MAP or ext in ['.txt', '.log', '.csv']:
                 try:
-                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    render_code_content(content, fname)
+                    with open(path, 'rb') as f:
+                        head = f.read(512)
+                        # A NUL this early means a misnamed binary; don't decode all of it
+                        is_binary = b'\x00' in head
+                        if not is_binary:
+                            content = (head + f.read()).decode('utf-8', errors='ignore')
+                    if is_binary:
+                        st.info(f"📦 Binary file ({ext}) - use Download button to view")
+                    else:
+                        render_code_content(content, fname)
                 except:
                     st.warning("Could not read file content")
             
             elif ext in ['.zip', '.7z', '.rar', '.tar', '.gz', '.tar.gz']:
                 # ZIP file contents listing
-                import zipfile
                 
                 st.markdown("#### 📦 Archive Contents")
                 
@@ -739,10 +804,12 @@ def _render_file_submission(course, row, idx):
                                 known_password = "ictkerala.org"
                                 try:
                                     zf.setpassword(known_password.encode())
-                                    # Test if password works by reading first file
+                                    # Test if password works on the first file. open() checks the
+                                    # encryption header, so one byte is enough; no need to inflate it all
                                     test_info = zf.infolist()[0] if zf.infolist() else None
                                     if test_info and test_info.file_size > 0:
-                                        zf.read(test_info.filename, pwd=known_password.encode())
+                                        with zf.open(test_info, pwd=known_password.encode()) as fh:
+                                            fh.read(1)
                                     st.success(f"✅ Unlocked with known password")
                                 except Exception:
                                     st.warning("⚠️ Could not unlock - password may be different")
@@ -761,7 +828,6 @@ def _render_file_submission(course, row, idx):
                                     })
                             
                             if file_list:
-                                import pandas as pd
                                 df = pd.DataFrame(file_list)
                                 st.dataframe(df, hide_index=True, width="stretch")
                                 st.caption(f"📊 {len(file_list)} file(s) • Total: {total_size / 1024:.1f} KB")
@@ -775,11 +841,16 @@ def _render_file_submission(course, row, idx):
                     st.info(f"📦 {ext.upper()} archive - extraction not supported, use Download button")
             
             else:
-                # Unknown extension - try magic byte detection
+                # Unknown extension - try magic byte detection on the header only,
+                # and read the rest of the file only for types that render it
                 with open(path, 'rb') as f:
-                    file_bytes = f.read()
-                
-                detected_type = detect_file_type(file_bytes)
+                    file_bytes = f.read(MAGIC_SNIFF_BYTES)
+                    detected_type = detect_file_type(file_bytes)
+                    if detected_type == '.txt':
+                        # render_code_content shows 50k chars, which fit in 200k UTF-8 bytes
+                        file_bytes += f.read(200000 - len(file_bytes))
+                    elif detected_type in ['.pdf', '.docx', '.doc'] or detected_type in IMAGE_EXTENSIONS:
+                        file_bytes += f.read()
                 
                 if detected_type == '.pdf':
                     render_pdf_content(file_bytes, fname, unique_key=f"eval_magic_{idx}_{selected_file_idx}")
@@ -855,11 +926,9 @@ def _render_link_submission(row, sub_type, course=None):
             
             # For GitHub URLs, show interactive browser (use effective link)
             if effective_link and 'github.com' in effective_link:
-                from streamlit_modules.ui.content_viewer import render_github_viewer
                 render_github_viewer(effective_link, get_config('github_pat'))
             elif effective_link and ('drive.google.com' in effective_link or 'docs.google.com' in effective_link):
                 # Google Drive / Docs — show embedded preview
-                import re
                 from core.ai import _extract_gdrive_file_id, _detect_gdrive_type
                 
                 gdrive_id = _extract_gdrive_file_id(effective_link)
@@ -896,7 +965,6 @@ def _render_link_submission(row, sub_type, course=None):
         
         # Check if submission looks like it could be a GitHub owner/repo format
         # Pattern: word/word (e.g., "Jiya1922/NetworkSimLab-jiyanna")
-        import re
         github_like_match = re.search(r'^([A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+)$', submission_text.strip())
         
         if github_like_match:
@@ -1463,7 +1531,6 @@ def _render_ai_scoring_section(course, row, idx, data):
             percentage_score = (moodle_score / effective_max) * 100
             
             # Create evaluation dict from Moodle data
-            from datetime import datetime
             restored_eval = {
                 'total_score': round(percentage_score, 1),
                 'criteria_scores': [],  # No per-criterion breakdown from Moodle
@@ -1520,7 +1587,6 @@ def _render_ai_scoring_section(course, row, idx, data):
                     percentage_score = (moodle_score / effective_max) * 100
                     
                     # Create evaluation dict from Moodle data
-                    from datetime import datetime
                     restored_eval = {
                         'total_score': round(percentage_score, 1),
                         'criteria_scores': [],
@@ -1614,13 +1680,13 @@ def _perform_batch_scoring(course, data, rubric, module_id, group_id, auto_fetch
             # For file submissions, check if files need to be fetched
             if submission_type == 'file':
                 submission_files = _parse_submission_files(row.get('Submission_Files', []))
-                safe_student = "".join([c for c in student_name if c.isalnum() or c in (' ', '-', '_')]).strip()
+                safe_student = safe_student_dirname(student_name)
                 
                 has_unfetched = False
                 for f in submission_files:
                     fname = f[0] if isinstance(f, (list, tuple)) else str(f)
                     furl = f[1] if isinstance(f, (list, tuple)) and len(f) > 1 else None
-                    safe_filename = "".join([c for c in fname if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+                    safe_filename = safe_download_filename(fname)
                     local_path = Path(f"output/course_{course['id']}/downloads/{safe_student}/{safe_filename}")
                     
                     if not local_path.exists():
@@ -1665,7 +1731,6 @@ def _perform_batch_scoring(course, data, rubric, module_id, group_id, auto_fetch
                     # Check if on time
                     last_modified = row.get('Last Modified', '')
                     if last_modified:
-                        from datetime import datetime
                         try:
                             sub_time = datetime.strptime(last_modified, "%A, %d %B %Y, %I:%M %p")
                             submission_content['on_time'] = sub_time <= due_date
@@ -1995,7 +2060,6 @@ def _perform_scoring(course, row, rubric, module_id, group_id, data, is_rescore=
             # Check if on time
             last_modified = row.get('Last Modified', '')
             if last_modified:
-                from datetime import datetime
                 try:
                     sub_time = datetime.strptime(last_modified, "%A, %d %B %Y, %I:%M %p")
                     submission_content['on_time'] = sub_time <= due_date
@@ -2035,7 +2099,6 @@ def _parse_moodle_grade(grade_str):
     if not grade_str or grade_str == '-':
         return None, None
     
-    import re
     match = re.search(r'(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)', str(grade_str))
     if match:
         return float(match.group(1)), float(match.group(2))
@@ -2164,7 +2227,6 @@ def _format_feedback_html(evaluation):
 
 def _submit_to_moodle(course, row, evaluation, max_grade, max_grade_source='unknown'):
     """Submit grade and feedback to Moodle."""
-    import html
     
     # Warn user if using default max grade
     if max_grade_source == 'default':
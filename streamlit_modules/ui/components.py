@@ -1,12 +1,26 @@
+import functools
+import time
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timedelta
 
 def format_timestamp(iso_string):
     """Format ISO timestamp for display"""
+    try:
+        # Cached per input for the current minute; relative labels are minute-grained anyway
+        return _format_timestamp_cached(iso_string, int(time.time() // 60))
+    except TypeError:  # unhashable input
+        return iso_string
+
+@functools.lru_cache(maxsize=4096)
+def _format_timestamp_cached(iso_string, minute_bucket):
+    """format_timestamp body, with 'now' taken as the start of ``minute_bucket``."""
     try:
         dt = datetime.fromisoformat(iso_string)
-        now = datetime.now()
+        now = datetime.fromtimestamp(minute_bucket * 60)
         diff = now - dt
+        if timedelta(minutes=-1) < diff < timedelta(0):
+            # Updated after the bucket started
+            diff = timedelta(0)
         
         if diff.days == 0:
             if diff.seconds < 60:
@@ -32,16 +46,10 @@ def show_data_status(meta, data_key, data_name):
         info = meta[data_key]
         timestamp = format_timestamp(info.get('updated', ''))
         rows = info.get('rows', 0)
-        st.markdown(
-            f'<span class="stale-badge">📂 Loaded from disk • {rows} rows • Updated {timestamp}</span>',
-            unsafe_allow_html=True
-        )
+        st.caption(f"📂 Loaded from disk • {rows} rows • Updated {timestamp}")
         return True
     return False
 
 def show_fresh_status(rows_count):
     """Show fresh data status"""
-    st.markdown(
-        f'<span class="fresh-badge">✓ Fresh data • {rows_count} rows • Just now</span>',
-        unsafe_allow_html=True
-    )
+    st.caption(f":green[✓ Fresh data • {rows_count} rows • Just now]")
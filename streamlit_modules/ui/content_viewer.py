@@ -3,17 +3,90 @@ Content viewers for the Evaluation tab.
 Provides interactive viewing for GitHub repos and PDF files.
 """
 
+import ast
 import base64
+import binascii
+import functools
+import hashlib
+import html
+import io
+import json
 import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Optional, List, Set, Callable, Any
 
+import pandas as pd
+import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from core.ai import extract_pdf_text, fetch_github_content
 from core.persistence import get_config
 
+try:
+    import deflate  # Optional libdeflate bindings for faster ZIP previews
+except ImportError:
+    deflate = None
+
+try:
+    import orjson  # Optional faster JSON parsing for GitHub API responses
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+try:
+    import pybase64  # Optional SIMD base64 for documents embedded in viewers
+    _b64encode = pybase64.b64encode
+except ImportError:
+    _b64encode = base64.b64encode
+
 logger = logging.getLogger(__name__)
 
+
+@st.cache_resource
+def _gh_session() -> requests.Session:
+    """
+    Shared keep-alive session for GitHub API calls and raw file downloads.
+    
+    Reusing it lets repeat navigation/previews skip the TCP/TLS handshake;
+    transient 5xx responses are retried with a short backoff.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                  allowed_methods=["GET"])
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+# Background pool for speculative GitHub fetches done while the user is still
+# reading the current listing or preview
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gh_prefetch")
+
+# Archive entry reads get their own small pool so they never queue behind
+# slow network fetches in _prefetch_pool
+_zip_read_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="zip_prefetch")
+
+# Number of files prefetched when a directory listing is loaded
+PREFETCH_FILE_COUNT = 4
+
+# Number of subdirectory listings prefetched, and how long a click waits for one in flight
+PREFETCH_DIR_COUNT = 3
+PREFETCH_WAIT_SECONDS = 10
+
+# In-flight directory prefetches, keyed like the _fetch_directory_listing cache
+_pending_listings: Dict[tuple, Any] = {}
+
 # File extension to language mapping for syntax highlighting
 LANGUAGE_MAP = {
     '.py': 'python',
@@ -46,6 +119,15 @@ LANGUAGE_MAP = {
 # Default: 512KB (512 * 1024 = 524288 bytes)
 MAX_INLINE_SIZE = 512 * 1024  # Legacy constant for backwards compatibility
 
+# Characters of extracted PDF text put in a submission's text area. The whole
+# value is resent on every rerun, so longer text is offered as a download.
+PDF_TEXT_PREVIEW_CHARS = 50000
+
+def b64encode_str(data: bytes) -> str:
+    """Base64-encode bytes for embedding in HTML (uses pybase64 when installed)."""
+    return _b64encode(data).decode('ascii')
+
+
 def get_max_inline_size():
     """Get max inline file size from config (in bytes)."""
     try:
@@ -71,6 +153,38 @@ ARCHIVE_EXTENSIONS = ['.zip', '.7z', '.rar', '.tar', '.gz']
 # HTML file extensions (for rich preview, separate from code view)
 HTML_EXTENSIONS = ['.html', '.htm']
 
+# Archive preview dispatch: extension -> renderer kind. Built with setdefault in
+# the order of the original if/elif chain, so the first group listing an
+# extension wins (e.g. '.md' stays 'text' and '.html' stays 'html').
+_PREVIEW_HANDLERS: Dict[str, str] = {}
+for _kind, _exts in (
+    ('text', ['.txt', '.md', '.csv', '.log']),
+    ('html', HTML_EXTENSIONS),
+    ('lang', LANGUAGE_MAP),
+    ('image', IMAGE_EXTENSIONS),
+    ('json', ['.json']),
+    ('pdf', ['.pdf']),
+    ('docx', ['.docx', '.doc']),
+):
+    for _ext in _exts:
+        _PREVIEW_HANDLERS.setdefault(_ext, _kind)
+del _kind, _exts, _ext
+
+# First URL in a link submission
+_URL_RE = re.compile(r'https?://\S+', re.IGNORECASE)
+
+# owner/repo from a GitHub repository URL
+_GH_URL_RE = re.compile(r'github\.com/([^/]+)/([^/\s]+)')
+
+
+# Header window examined by detect_file_type (matches filetype's own read size)
+MAGIC_SNIFF_BYTES = 8192
+
+
+# Bytes allowed in text: printable ASCII, tab/newline/CR, and 0x80+ (only seen
+# inside multi-byte characters once the sample has decoded as UTF-8)
+_TEXT_BYTES = bytes(range(32, 127)) + b'\t\n\r' + bytes(range(128, 256))
+
 
 def detect_file_type(data: bytes) -> Optional[str]:
     """
@@ -80,7 +194,8 @@ def detect_file_type(data: bytes) -> Optional[str]:
     Falls back to checking if content is mostly printable text.
     
     Args:
-        data: File content as bytes (at least first 261 bytes needed)
+        data: File content as bytes (at least first 261 bytes needed). Only the
+              first MAGIC_SNIFF_BYTES are examined, so callers can pass a header slice.
     
     Returns:
         Extension string like '.pdf' or '.txt', or None for binary files
@@ -95,14 +210,14 @@ def detect_file_type(data: bytes) -> Optional[str]:
         
         # Not a known binary format - check if it's text
         try:
-            # Try to decode as UTF-8
-            sample = data[:4096] if len(data) > 4096 else data
-            text = sample.decode('utf-8')
+            # Must be valid UTF-8
+            sample = data[:4096]
+            sample.decode('utf-8')
             
-            # Check if mostly printable (>90% printable chars)
-            if text and len(text) > 0:
-                printable_ratio = sum(c.isprintable() or c in '\n\r\t' for c in text) / len(text)
-                if printable_ratio > 0.9:
+            # Check if mostly printable (<10% control bytes), counted in C via translate
+            if sample:
+                non_text = len(sample.translate(None, _TEXT_BYTES))
+                if non_text / len(sample) < 0.1:
                     return '.txt'  # Treat as text
         except UnicodeDecodeError:
             pass
@@ -114,38 +229,54 @@ def detect_file_type(data: bytes) -> Optional[str]:
         return None
 
 
+# Characters sampled by _looks_binary; binary data shows control chars almost immediately
+_BINARY_SNIFF_CHARS = 4096
+
+
+def _looks_binary(content: str) -> bool:
+    """
+    Check whether decoded content looks binary, sampling only its start.
+    
+    Any control byte left after deleting _TEXT_BYTES marks it binary. The
+    deletion runs in C over the UTF-8 sample instead of a per-character
+    str.isprintable() walk; multi-byte characters are all 0x80+ and pass.
+    """
+    sample = content[:_BINARY_SNIFF_CHARS].encode('utf-8', 'surrogatepass')
+    return bool(sample.translate(None, _TEXT_BYTES))
+
+
 # ============================================================================
 # SHARED CONTENT RENDERING HELPERS
 # ============================================================================
 
 def is_image_file(filename: str) -> bool:
     """Check if filename is an image based on extension."""
-    return Path(filename).suffix.lower() in IMAGE_EXTENSIONS
+    return _file_ext(filename) in IMAGE_EXTENSIONS
 
 
 def is_code_file(filename: str) -> bool:
     """Check if filename is a code file with syntax highlighting support."""
-    return Path(filename).suffix.lower() in LANGUAGE_MAP
+    return _file_ext(filename) in LANGUAGE_MAP
 
 
 def is_text_file(filename: str) -> bool:
     """Check if filename is a plain text file."""
-    return Path(filename).suffix.lower() in TEXT_EXTENSIONS
+    return _file_ext(filename) in TEXT_EXTENSIONS
 
 
 def is_archive_file(filename: str) -> bool:
     """Check if filename is an archive."""
-    return Path(filename).suffix.lower() in ARCHIVE_EXTENSIONS
+    return _file_ext(filename) in ARCHIVE_EXTENSIONS
 
 
 def is_html_file(filename: str) -> bool:
     """Check if filename is an HTML file for rich preview."""
-    return Path(filename).suffix.lower() in HTML_EXTENSIONS
+    return _file_ext(filename) in HTML_EXTENSIONS
 
 
 def get_language_for_file(filename: str) -> Optional[str]:
     """Get syntax highlighting language for a file based on extension."""
-    ext = Path(filename).suffix.lower()
+    ext = _file_ext(filename)
     return LANGUAGE_MAP.get(ext)
 
 
@@ -218,49 +349,46 @@ def render_file_info_panel(filename: str, file_type: str = "", size_bytes: int =
         extra_info: Additional key-value pairs to display
         download_url: Optional download URL
     """
-    size_str = f"{size_bytes / 1024:.1f} KB" if size_bytes > 0 else "—"
     if not file_type:
         file_type = Path(filename).suffix.upper().replace(".", "") or "File"
     
-    # Build info items
-    info_items = [
-        f'<div style="display: flex; align-items: center; gap: 6px;">'
-        f'<span style="color: #888;">📄 File:</span>'
-        f'<span style="color: #fff; font-weight: 500;">{filename}</span>'
-        f'</div>',
-        f'<div style="display: flex; align-items: center; gap: 6px;">'
-        f'<span style="color: #888;">📁 Type:</span>'
-        f'<span style="color: #fff; font-weight: 500;">{file_type}</span>'
-        f'</div>',
+    extra_items = tuple(extra_info.items()) if extra_info else ()
+    st.markdown(_file_info_html(filename, file_type, size_bytes, extra_items, download_url),
+                unsafe_allow_html=True)
+
+
+@functools.lru_cache(maxsize=256)
+def _file_info_html(filename: str, file_type: str, size_bytes: int,
+                    extra_items: tuple, download_url: str) -> str:
+    """
+    Build the file info panel markup, memoized on its inputs.
+    
+    Kept on a single line so st.markdown does not treat indented HTML as a
+    code block.
+    """
+    size_str = f"{size_bytes / 1024:.1f} KB" if size_bytes > 0 else "—"
+    items = [("📄 File", filename), ("📁 Type", file_type), ("📊 Size", size_str), *extra_items]
+    
+    parts = [
         f'<div style="display: flex; align-items: center; gap: 6px;">'
-        f'<span style="color: #888;">📊 Size:</span>'
-        f'<span style="color: #fff; font-weight: 500;">{size_str}</span>'
-        f'</div>',
+        f'<span style="color: #888;">{html.escape(key)}:</span>'
+        f'<span style="color: #fff; font-weight: 500;">{html.escape(str(value))}</span>'
+        f'</div>'
+        for key, value in items
     ]
     
-    # Add extra info
-    if extra_info:
-        for key, value in extra_info.items():
-            info_items.append(
-                f'<div style="display: flex; align-items: center; gap: 6px;">'
-                f'<span style="color: #888;">{key}:</span>'
-                f'<span style="color: #fff; font-weight: 500;">{value}</span>'
-                f'</div>'
-            )
-    
     # Add download link
     if download_url:
-        info_items.append(
-            f'<a href="{download_url}" target="_blank" style="color: #4da6ff; text-decoration: none;">📥 Download</a>'
+        parts.append(
+            f'<a href="{html.escape(download_url)}" target="_blank" '
+            f'style="color: #4da6ff; text-decoration: none;">📥 Download</a>'
         )
     
-    info_html = f'''
-    <div style="background: #2d2d2d; border-radius: 6px; padding: 10px 15px; margin-bottom: 10px; 
-                display: flex; flex-wrap: wrap; gap: 20px; align-items: center; font-size: 13px; color: #ccc;">
-        {''.join(info_items)}
-    </div>
-    '''
-    st.components.v1.html(info_html, height=50)
+    return (
+        '<div style="background: #2d2d2d; border-radius: 6px; padding: 10px 15px; margin-bottom: 10px; '
+        'display: flex; flex-wrap: wrap; gap: 20px; align-items: center; font-size: 13px; color: #ccc;">'
+        + ''.join(parts) + '</div>'
+    )
 
 
 def render_pdf_viewer(pdf_bytes: bytes, filename: str = "document.pdf", unique_key: str = ""):
@@ -289,7 +417,7 @@ def render_pdf_viewer(pdf_bytes: bytes, filename: str = "document.pdf", unique_k
             )
             return
         
-        b64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
+        b64_pdf = b64encode_str(pdf_bytes)
         idx = unique_key or abs(hash(pdf_bytes[:100]))
         
         # PDF.js viewer with zoom, fullscreen, multi-page scrolling
@@ -355,7 +483,7 @@ def render_pdf_viewer(pdf_bytes: bytes, filename: str = "document.pdf", unique_k
                 <span id="zoomLevel_{idx}">100%</span>
                 <button class="pdf-btn_{idx}" onclick="zoomIn_{idx}()">+</button>
                 <span>|</span>
-                <button class="pdf-btn_{idx}" onclick="toggleFullscreen_{idx}()" id="fsBtn_{idx}">⛶ Fullscreen</button>
+                <button class="pdf-btn_{idx}" onclick="toggleFullscreen_{idx}()" id="fsBtn_{idx}" data-fs-btn>⛶ Fullscreen</button>
             </div>
             <div id="pdfScroller_{idx}">
                 <div id="pdfPages_{idx}"></div>
@@ -415,12 +543,15 @@ def render_pdf_viewer(pdf_bytes: bytes, filename: str = "document.pdf", unique_k
                     }}
                 }};
                 
-                document.addEventListener('fullscreenchange', () => {{
-                    const btn = document.getElementById('fsBtn_{idx}');
-                    if (btn && !document.fullscreenElement) {{
-                        btn.textContent = '⛶ Fullscreen';
-                    }}
-                }});
+                if (!window.__fsHandlerInstalled) {{
+                    document.addEventListener('fullscreenchange', () => {{
+                        if (document.fullscreenElement) return;
+                        document.querySelectorAll('[data-fs-btn]').forEach(b => {{
+                            b.textContent = '⛶ Fullscreen';
+                        }});
+                    }});
+                    window.__fsHandlerInstalled = true;
+                }}
                 
                 try {{
                     pdfDoc = await pdfjsLib.getDocument({{ data: bytes }}).promise;
@@ -439,6 +570,73 @@ def render_pdf_viewer(pdf_bytes: bytes, filename: str = "document.pdf", unique_k
         st.error(f"Could not display PDF: {e}")
 
 
+@st.cache_data(show_spinner=False, max_entries=128)
+def _cached_pdf_text(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Extract text from a PDF on disk, memoized per file version.
+    
+    mtime_ns and size are part of the cache key only, so a re-downloaded
+    file is extracted again.
+    """
+    return extract_pdf_text(path)
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _cached_text_file(path: str, mtime_ns: int, size: int) -> Optional[str]:
+    """
+    Read a text/code file from disk, memoized per file version like _cached_pdf_text.
+    
+    Returns None without decoding the rest when the first 512 bytes contain a
+    NUL, i.e. a binary file under a text extension.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(512)
+        if b'\x00' in head:
+            return None
+        return (head + f.read()).decode('utf-8', errors='ignore')
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_file_bytes(path: str, mtime_ns: int, size: int) -> bytes:
+    """Read a file's bytes for a download button, memoized per file version."""
+    return Path(path).read_bytes()
+
+
+def _file_download_button(label: str, local_path: Path, file_stat: os.stat_result,
+                          file_name: str, key: Optional[str] = None):
+    """
+    Download button for a local file. Only files within the inline size limit
+    go through _cached_file_bytes; larger ones (videos, archives) are streamed
+    from an open handle so they never sit in the process-wide cache.
+    """
+    if file_stat.st_size <= get_max_inline_size():
+        data = _cached_file_bytes(str(local_path), file_stat.st_mtime_ns, file_stat.st_size)
+        st.download_button(label, data, file_name, key=key)
+    else:
+        with open(local_path, "rb") as file:
+            st.download_button(label, file, file_name, key=key)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_pdf_bytes_text(pdf_bytes: bytes) -> str:
+    """
+    Extract text from in-memory PDF bytes (GitHub/ZIP sources), memoized on content.
+    """
+    
+    # extract_pdf_text expects a file path
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+        temp_file.write(pdf_bytes)
+        temp_path = temp_file.name
+    
+    try:
+        return extract_pdf_text(temp_path)
+    finally:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
 def render_pdf_content(
     pdf_source,
     filename: str = "document.pdf",
@@ -462,7 +660,6 @@ def render_pdf_content(
         - Rendered Pages: High-quality page images using PyMuPDF
         - Text Only: Extracted text content
     """
-    import tempfile
     from pathlib import Path as PathLib
     
     # Normalize source to bytes and optional path
@@ -582,25 +779,13 @@ def render_pdf_content(
     elif view_mode == "📝 Text Only":
         # Extract text from PDF
         try:
-            from core.ai import extract_pdf_text
-            
-            # extract_pdf_text expects a file path
+            # Extraction takes seconds per document; cache it so reruns
+            # (any widget click on the page) don't redo the work
             if pdf_path and pdf_path.exists():
-                text_content = extract_pdf_text(str(pdf_path))
+                pdf_stat = pdf_path.stat()
+                text_content = _cached_pdf_text(str(pdf_path), pdf_stat.st_mtime_ns, pdf_stat.st_size)
             else:
-                # Create temp file for extraction
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                    temp_file.write(pdf_bytes)
-                    temp_path = temp_file.name
-                
-                try:
-                    text_content = extract_pdf_text(temp_path)
-                finally:
-                    import os
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
+                text_content = _cached_pdf_bytes_text(pdf_bytes)
             
             if text_content.startswith("(") and text_content.endswith(")"):
                 # Error message from extraction
@@ -618,6 +803,122 @@ def render_pdf_content(
             st.error(f"Error extracting text: {e}")
             logger.error(f"Text extraction error: {e}")
 
+# Shared viewer stylesheets. Each viewer renders in its own components iframe,
+# so the CSS is still sent per viewer, but it is built once and scoped by class
+# instead of being re-formatted with a per-instance id suffix.
+_DOCX_VIEWER_CSS = """
+<style>
+    .docxContainer {
+        width: 100%;
+        background: #ffffff;
+        border-radius: 8px;
+        padding: 10px;
+    }
+    .docxContainer:fullscreen {
+        background: #ffffff;
+        padding: 20px;
+    }
+    .docxScroller {
+        max-height: 500px;
+        overflow-y: auto;
+        background: #ffffff;
+        border-radius: 4px;
+        padding: 20px 30px;
+        color: #333;
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        line-height: 1.6;
+    }
+    .docxContainer:fullscreen .docxScroller {
+        max-height: calc(100vh - 80px);
+    }
+    .docxContent h1 { font-size: 1.8em; margin: 0.8em 0; color: #222; }
+    .docxContent h2 { font-size: 1.5em; margin: 0.7em 0; color: #333; }
+    .docxContent h3 { font-size: 1.2em; margin: 0.6em 0; color: #444; }
+    .docxContent p { margin: 0.5em 0; }
+    .docxContent table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+    .docxContent td, .docxContent th { border: 1px solid #ddd; padding: 8px; }
+    .docxContent ul, .docxContent ol { padding-left: 2em; }
+    .docx-controls {
+        display: flex;
+        justify-content: flex-end;
+        gap: 10px;
+        margin-bottom: 10px;
+    }
+    .docx-btn {
+        background: #333;
+        color: white;
+        border: 1px solid #555;
+        padding: 6px 12px;
+        border-radius: 4px;
+        cursor: pointer;
+        font-size: 13px;
+    }
+    .docx-btn:hover { background: #444; }
+    .docxStatus { color: #666; font-size: 13px; }
+    .docx-info-panel {
+        background: #2d2d2d;
+        border-radius: 6px;
+        padding: 10px 15px;
+        margin-bottom: 10px;
+        display: flex;
+        flex-wrap: wrap;
+        gap: 20px;
+        align-items: center;
+        font-size: 13px;
+        color: #ccc;
+    }
+    .docx-info-item {
+        display: flex;
+        align-items: center;
+        gap: 6px;
+    }
+    .docx-info-label { color: #888; }
+    .docx-info-value { color: #fff; font-weight: 500; }
+</style>
+"""
+
+_HTML_VIEWER_CSS = """
+<style>
+    .htmlContainer { 
+        width: 100%; 
+        background: #ffffff; 
+        border-radius: 8px; 
+        padding: 10px;
+    }
+    .htmlContainer:fullscreen {
+        background: #ffffff;
+        padding: 20px;
+    }
+    .htmlFrame {
+        width: 100%;
+        height: 500px;
+        border: 1px solid #ddd;
+        border-radius: 4px;
+        background: #fff;
+    }
+    .htmlContainer:fullscreen .htmlFrame {
+        height: calc(100vh - 80px);
+    }
+    .html-controls {
+        display: flex;
+        justify-content: flex-end;
+        gap: 10px;
+        margin-bottom: 10px;
+    }
+    .html-btn {
+        background: #333;
+        color: white;
+        border: 1px solid #555;
+        padding: 6px 12px;
+        border-radius: 4px;
+        cursor: pointer;
+        font-size: 13px;
+    }
+    .html-btn:hover { background: #444; }
+</style>
+"""
+
+
 def render_docx_viewer(docx_bytes: bytes, filename: str = "document.docx", unique_key: str = ""):
     """
     DOCX content viewer using mammoth.js with document metadata display.
@@ -633,8 +934,6 @@ def render_docx_viewer(docx_bytes: bytes, filename: str = "document.docx", uniqu
         unique_key: Optional unique key suffix to prevent duplicate key errors
     """
     try:
-        import io
-        
         # Check if DOCX is valid (should start with "PK" - ZIP magic bytes)
         if len(docx_bytes) < 4 or docx_bytes[:2] != b'PK':
             st.warning("🔐 This document appears to be password-protected and cannot be previewed.")
@@ -653,7 +952,6 @@ def render_docx_viewer(docx_bytes: bytes, filename: str = "document.docx", uniqu
         }
         
         try:
-            import zipfile
             import xml.etree.ElementTree as ET
             
             with zipfile.ZipFile(io.BytesIO(docx_bytes), 'r') as zf:
@@ -709,113 +1007,46 @@ def render_docx_viewer(docx_bytes: bytes, filename: str = "document.docx", uniqu
         except Exception:
             pass  # Metadata extraction failed, continue with defaults
         
-        b64_docx = base64.b64encode(docx_bytes).decode('utf-8')
+        b64_docx = b64encode_str(docx_bytes)
         idx = unique_key or hash(docx_bytes[:100])
         
         mammoth_html = f'''
-        <style>
-            #docxContainer_{idx} {{
-                width: 100%;
-                background: #ffffff;
-                border-radius: 8px;
-                padding: 10px;
-            }}
-            #docxContainer_{idx}:fullscreen {{
-                background: #ffffff;
-                padding: 20px;
-            }}
-            #docxScroller_{idx} {{
-                max-height: 500px;
-                overflow-y: auto;
-                background: #ffffff;
-                border-radius: 4px;
-                padding: 20px 30px;
-                color: #333;
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                line-height: 1.6;
-            }}
-            #docxContainer_{idx}:fullscreen #docxScroller_{idx} {{
-                max-height: calc(100vh - 80px);
-            }}
-            #docxContent_{idx} h1 {{ font-size: 1.8em; margin: 0.8em 0; color: #222; }}
-            #docxContent_{idx} h2 {{ font-size: 1.5em; margin: 0.7em 0; color: #333; }}
-            #docxContent_{idx} h3 {{ font-size: 1.2em; margin: 0.6em 0; color: #444; }}
-            #docxContent_{idx} p {{ margin: 0.5em 0; }}
-            #docxContent_{idx} table {{ border-collapse: collapse; width: 100%; margin: 1em 0; }}
-            #docxContent_{idx} td, #docxContent_{idx} th {{ border: 1px solid #ddd; padding: 8px; }}
-            #docxContent_{idx} ul, #docxContent_{idx} ol {{ padding-left: 2em; }}
-            .docx-controls_{idx} {{
-                display: flex;
-                justify-content: flex-end;
-                gap: 10px;
-                margin-bottom: 10px;
-            }}
-            .docx-btn_{idx} {{
-                background: #333;
-                color: white;
-                border: 1px solid #555;
-                padding: 6px 12px;
-                border-radius: 4px;
-                cursor: pointer;
-                font-size: 13px;
-            }}
-            .docx-btn_{idx}:hover {{ background: #444; }}
-            #docxStatus_{idx} {{ color: #666; font-size: 13px; }}
-            .docx-info-panel_{idx} {{
-                background: #2d2d2d;
-                border-radius: 6px;
-                padding: 10px 15px;
-                margin-bottom: 10px;
-                display: flex;
-                flex-wrap: wrap;
-                gap: 20px;
-                align-items: center;
-                font-size: 13px;
-                color: #ccc;
-            }}
-            .docx-info-item_{idx} {{
-                display: flex;
-                align-items: center;
-                gap: 6px;
-            }}
-            .docx-info-label_{idx} {{ color: #888; }}
-            .docx-info-value_{idx} {{ color: #fff; font-weight: 500; }}
-        </style>
+        {_DOCX_VIEWER_CSS}
         
-        <div id="docxContainer_{idx}">
-            <div class="docx-info-panel_{idx}">
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">👤 Author:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['author']}</span>
+        <div id="docxContainer_{idx}" class="docxContainer" data-idx="{idx}">
+            <div class="docx-info-panel">
+                <div class="docx-info-item">
+                    <span class="docx-info-label">👤 Author:</span>
+                    <span class="docx-info-value">{doc_meta['author']}</span>
                 </div>
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">📝 Words:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['words']}</span>
+                <div class="docx-info-item">
+                    <span class="docx-info-label">📝 Words:</span>
+                    <span class="docx-info-value">{doc_meta['words']}</span>
                 </div>
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">📄 Meta pages:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['meta_pages']}</span>
+                <div class="docx-info-item">
+                    <span class="docx-info-label">📄 Meta pages:</span>
+                    <span class="docx-info-value">{doc_meta['meta_pages']}</span>
                 </div>
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">⏱️ Edit time:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['edit_time']}</span>
+                <div class="docx-info-item">
+                    <span class="docx-info-label">⏱️ Edit time:</span>
+                    <span class="docx-info-value">{doc_meta['edit_time']}</span>
                 </div>
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">🔄 Revisions:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['revision']}</span>
+                <div class="docx-info-item">
+                    <span class="docx-info-label">🔄 Revisions:</span>
+                    <span class="docx-info-value">{doc_meta['revision']}</span>
                 </div>
-                <div class="docx-info-item_{idx}">
-                    <span class="docx-info-label_{idx}">📋 Template:</span>
-                    <span class="docx-info-value_{idx}">{doc_meta['template']}</span>
+                <div class="docx-info-item">
+                    <span class="docx-info-label">📋 Template:</span>
+                    <span class="docx-info-value">{doc_meta['template']}</span>
                 </div>
                 {f'<div style="background: #553300; color: #ffaa00; padding: 4px 10px; border-radius: 4px; font-size: 12px;">{doc_meta["warning"]}</div>' if doc_meta['warning'] else ''}
             </div>
-            <div class="docx-controls_{idx}">
-                <span id="docxStatus_{idx}">Loading document...</span>
-                <button class="docx-btn_{idx}" onclick="toggleDocxFullscreen_{idx}()" id="docxFsBtn_{idx}">⛶ Fullscreen</button>
+            <div class="docx-controls">
+                <span id="docxStatus_{idx}" class="docxStatus">Loading document...</span>
+                <button class="docx-btn" onclick="toggleDocxFullscreen_{idx}()" id="docxFsBtn_{idx}" data-fs-btn>⛶ Fullscreen</button>
             </div>
-            <div id="docxScroller_{idx}">
-                <div id="docxContent_{idx}"></div>
+            <div class="docxScroller">
+                <div id="docxContent_{idx}" class="docxContent"></div>
             </div>
         </div>
         
@@ -862,12 +1093,15 @@ def render_docx_viewer(docx_bytes: bytes, filename: str = "document.docx", uniqu
                     }}
                 }};
                 
-                document.addEventListener('fullscreenchange', () => {{
-                    const btn = document.getElementById('docxFsBtn_{idx}');
-                    if (btn && !document.fullscreenElement) {{
-                        btn.textContent = '⛶ Fullscreen';
-                    }}
-                }});
+                if (!window.__fsHandlerInstalled) {{
+                    document.addEventListener('fullscreenchange', () => {{
+                        if (document.fullscreenElement) return;
+                        document.querySelectorAll('[data-fs-btn]').forEach(b => {{
+                            b.textContent = '⛶ Fullscreen';
+                        }});
+                    }});
+                    window.__fsHandlerInstalled = true;
+                }}
             }})();
         </script>
         '''
@@ -901,55 +1135,17 @@ def render_html_viewer(html_content: str, filename: str = "document.html", uniqu
         idx = unique_key or abs(hash(html_content[:100]))
         
         # Escape HTML for embedding in JavaScript string
-        import json
         escaped_html = json.dumps(html_content)
         
         # HTML viewer with iframe and controls
         html_viewer = f'''
-        <style>
-            #htmlContainer_{idx} {{ 
-                width: 100%; 
-                background: #ffffff; 
-                border-radius: 8px; 
-                padding: 10px;
-            }}
-            #htmlContainer_{idx}:fullscreen {{
-                background: #ffffff;
-                padding: 20px;
-            }}
-            #htmlFrame_{idx} {{
-                width: 100%;
-                height: 500px;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                background: #fff;
-            }}
-            #htmlContainer_{idx}:fullscreen #htmlFrame_{idx} {{
-                height: calc(100vh - 80px);
-            }}
-            .html-controls_{idx} {{
-                display: flex;
-                justify-content: flex-end;
-                gap: 10px;
-                margin-bottom: 10px;
-            }}
-            .html-btn_{idx} {{
-                background: #333;
-                color: white;
-                border: 1px solid #555;
-                padding: 6px 12px;
-                border-radius: 4px;
-                cursor: pointer;
-                font-size: 13px;
-            }}
-            .html-btn_{idx}:hover {{ background: #444; }}
-        </style>
+        {_HTML_VIEWER_CSS}
         
-        <div id="htmlContainer_{idx}">
-            <div class="html-controls_{idx}">
-                <button class="html-btn_{idx}" onclick="toggleFullscreen_{idx}()" id="fsBtn_{idx}">⛶ Fullscreen</button>
+        <div id="htmlContainer_{idx}" class="htmlContainer" data-idx="{idx}">
+            <div class="html-controls">
+                <button class="html-btn" onclick="toggleFullscreen_{idx}()" id="fsBtn_{idx}" data-fs-btn>⛶ Fullscreen</button>
             </div>
-            <iframe id="htmlFrame_{idx}" sandbox="allow-same-origin"></iframe>
+            <iframe id="htmlFrame_{idx}" class="htmlFrame" sandbox="allow-same-origin"></iframe>
         </div>
         
         <script>
@@ -979,12 +1175,15 @@ def render_html_viewer(html_content: str, filename: str = "document.html", uniqu
                     }}
                 }};
                 
-                document.addEventListener('fullscreenchange', () => {{
-                    const btn = document.getElementById('fsBtn_{idx}');
-                    if (btn && !document.fullscreenElement) {{
-                        btn.textContent = '⛶ Fullscreen';
-                    }}
-                }});
+                if (!window.__fsHandlerInstalled) {{
+                    document.addEventListener('fullscreenchange', () => {{
+                        if (document.fullscreenElement) return;
+                        document.querySelectorAll('[data-fs-btn]').forEach(b => {{
+                            b.textContent = '⛶ Fullscreen';
+                        }});
+                    }});
+                    window.__fsHandlerInstalled = true;
+                }}
             }})();
         </script>
         '''
@@ -1006,11 +1205,9 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
     Interactive GitHub repository browser with file table and content preview.
     Follows file explorer + preview pattern (table on top, preview below).
     """
-    import re
-    import pandas as pd
     
     # Parse repo URL
-    match = re.search(r'github\.com/([^/]+)/([^/\s]+)', repo_url)
+    match = _GH_URL_RE.search(repo_url)
     if not match:
         st.error("Could not parse GitHub URL")
         st.markdown(f"**Link:** [{repo_url}]({repo_url})")
@@ -1023,14 +1220,11 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
     # Session state keys for this repo
     tree_key = f"gh_tree_{repo_id}"
     selected_key = f"gh_selected_{repo_id}"
-    content_cache_key = f"gh_content_{repo_id}"
     current_path_key = f"gh_path_{repo_id}"
     
     # Initialize state
     if selected_key not in st.session_state:
         st.session_state[selected_key] = None
-    if content_cache_key not in st.session_state:
-        st.session_state[content_cache_key] = {}
     if current_path_key not in st.session_state:
         st.session_state[current_path_key] = ""  # Root directory
     
@@ -1044,10 +1238,9 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
     # Fetch contents for current path
     if cache_key not in st.session_state:
         with st.spinner("Loading repository contents..."):
-            from core.ai import fetch_github_content
             if current_path:
                 # Fetch subdirectory
-                files = _fetch_directory_contents(owner, repo, current_path, pat, repo_id)
+                files = _fetch_directory_contents(owner, repo, current_path, pat)
                 readme = ""
             else:
                 # Fetch root
@@ -1058,6 +1251,8 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
                 files = result.get("files", [])
                 readme = result.get("readme", "")
             st.session_state[cache_key] = {"files": files, "readme": readme}
+            _prefetch_file_contents(owner, repo, files, pat)
+            _prefetch_directory_listings(owner, repo, files, pat)
     
     data = st.session_state[cache_key]
     files = data.get("files", [])
@@ -1080,28 +1275,11 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
     # === SECTION 2: File List Table ===
     st.markdown("#### 📂 Files")
     
-    # Build file list for dataframe
-    file_list = []
-    file_map = {}  # Map index to file info
+    # Table shape is memoized on (name, type, size), so reruns reuse it
+    file_map = dict(enumerate(files))  # Map index to file info
     
-    for i, f in enumerate(files):
-        name = f.get("name", "")
-        file_type = "📁 Directory" if f.get("type") == "dir" else Path(name).suffix.upper().replace(".", "") or "File"
-        size = f.get("size", 0)
-        size_str = f"{size / 1024:.1f} KB" if size > 0 else "—"
-        
-        icon = "📁" if f.get("type") == "dir" else _get_file_icon(name)
-        
-        file_list.append({
-            "": icon,
-            "Name": name,
-            "Type": file_type if f.get("type") != "dir" else "Directory",
-            "Size": size_str,
-        })
-        file_map[i] = f
-    
-    if file_list:
-        df = pd.DataFrame(file_list)
+    if files:
+        df = _build_file_table(tuple((f.get("name", ""), f.get("type"), f.get("size", 0)) for f in files))
         
         event = st.dataframe(
             df,
@@ -1112,13 +1290,17 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
             width="stretch"
         )
         
-        # Handle selection from table (but skip if navigation happened this cycle)
-        nav_flag_key = f"gh_nav_pending_{repo_id}"
-        if st.session_state.get(nav_flag_key):
-            # Clear the flag and skip table processing
-            del st.session_state[nav_flag_key]
-        elif event and event.selection and len(event.selection.rows) > 0:
-            selected_idx = event.selection.rows[0]
+        # Handle selection from table. Only react when the selected row changes,
+        # so a stale row selection does not undo Previous/Next navigation.
+        table_sel_key = f"gh_table_sel_{repo_id}_{current_path}"
+        selected_rows = event.selection.rows if event and event.selection else []
+        selected_idx = selected_rows[0] if selected_rows else None
+        if selected_idx != st.session_state.get(table_sel_key):
+            st.session_state[table_sel_key] = selected_idx
+        else:
+            selected_idx = None
+        
+        if selected_idx is not None:
             selected_file = file_map.get(selected_idx)
             
             if selected_file:
@@ -1144,44 +1326,7 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
     if selected:
         # Build list of previewable files (excluding directories) for navigation
         file_paths = [f.get("path", f.get("name")) for f in files if f.get("type") != "dir"]
-        current_idx = file_paths.index(selected) if selected in file_paths else -1
-        total_files = len(file_paths)
-        
-        # Navigation row: Previous | Title | Next
-        nav_col1, nav_col2, nav_col3 = st.columns([1, 4, 1])
-        nav_flag_key = f"gh_nav_pending_{repo_id}"
-        
-        with nav_col1:
-            if current_idx > 0:
-                if st.button("⬅️ Previous", key=f"gh_prev_{repo_id}"):
-                    st.session_state[nav_flag_key] = True
-                    st.session_state[selected_key] = file_paths[current_idx - 1]
-                    st.rerun()
-            else:
-                st.button("⬅️ Previous", key=f"gh_prev_{repo_id}", disabled=True)
-        
-        with nav_col2:
-            if current_idx >= 0:
-                st.markdown(f"#### 👁️ Preview ({current_idx + 1}/{total_files})")
-            else:
-                st.markdown("#### 👁️ Preview")
-        
-        with nav_col3:
-            if current_idx < total_files - 1 and current_idx >= 0:
-                if st.button("Next ➡️", key=f"gh_next_{repo_id}"):
-                    st.session_state[nav_flag_key] = True
-                    st.session_state[selected_key] = file_paths[current_idx + 1]
-                    st.rerun()
-            else:
-                st.button("Next ➡️", key=f"gh_next_{repo_id}", disabled=True)
-        
-        _render_file_preview(
-            selected_path=selected,
-            owner=owner,
-            repo=repo,
-            pat=pat,
-            repo_id=repo_id
-        )
+        _preview_fragment(file_paths, owner, repo, pat, repo_id)
     elif readme and not current_path:
         st.markdown("#### 📖 README.md")
         st.markdown(readme[:5000] if len(readme) > 5000 else readme)
@@ -1189,16 +1334,122 @@ def render_github_viewer(repo_url: str, pat: Optional[str] = None):
         st.info("👆 Select a file above to preview")
 
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def _build_file_table(entries: tuple) -> pd.DataFrame:
+    """
+    Build the directory listing DataFrame from (name, type, size) triples.
+    
+    Keyed on the hashable triples, so the table is only rebuilt when the
+    listing itself changes.
+    """
+    icons = []
+    names = []
+    types = []
+    sizes = []
+    
+    for name, entry_type, size in entries:
+        if entry_type == "dir":
+            icons.append("📁")
+            types.append("Directory")
+        else:
+            ext = _file_ext(name)
+            icons.append(_get_file_icon_ext(ext))
+            types.append(ext[1:].upper() or "File")
+        names.append(name)
+        sizes.append(f"{size / 1024:.1f} KB" if size > 0 else "—")
+    
+    return pd.DataFrame({"": icons, "Name": names, "Type": types, "Size": sizes})
+
+
+@st.fragment
+def _preview_fragment(file_paths: List[str], owner: str, repo: str,
+                      pat: Optional[str], repo_id: str):
+    """
+    Preview pane for the GitHub viewer, rerun on its own.
+    
+    Previous/Next only rerun this fragment, so the file table above is not
+    rebuilt on every navigation click. The selection is read from session
+    state because fragment reruns reuse the arguments of the original call.
+    """
+    selected_key = f"gh_selected_{repo_id}"
+    selected = st.session_state.get(selected_key)
+    if not selected:
+        return
+    
+    current_idx = file_paths.index(selected) if selected in file_paths else -1
+    total_files = len(file_paths)
+    
+    # Navigation row: Previous | Title | Next
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 4, 1])
+    
+    with nav_col1:
+        if current_idx > 0:
+            if st.button("⬅️ Previous", key=f"gh_prev_{repo_id}"):
+                st.session_state[selected_key] = file_paths[current_idx - 1]
+                st.rerun(scope="fragment")
+        else:
+            st.button("⬅️ Previous", key=f"gh_prev_{repo_id}", disabled=True)
+    
+    with nav_col2:
+        if current_idx >= 0:
+            st.markdown(f"#### 👁️ Preview ({current_idx + 1}/{total_files})")
+        else:
+            st.markdown("#### 👁️ Preview")
+    
+    with nav_col3:
+        if current_idx < total_files - 1 and current_idx >= 0:
+            if st.button("Next ➡️", key=f"gh_next_{repo_id}"):
+                st.session_state[selected_key] = file_paths[current_idx + 1]
+                st.rerun(scope="fragment")
+        else:
+            st.button("Next ➡️", key=f"gh_next_{repo_id}", disabled=True)
+    
+    _render_file_preview(
+        selected_path=selected,
+        owner=owner,
+        repo=repo,
+        pat=pat,
+        repo_id=repo_id
+    )
+
+
+# Icons for the file tables, keyed by lower-cased extension
+_FILE_ICONS = {
+    '.py': '🐍', '.js': '📜', '.ts': '📘', '.html': '🌐', '.css': '🎨',
+    '.json': '📋', '.md': '📝', '.txt': '📄', '.pdf': '📕', '.doc': '📄',
+    '.docx': '📄', '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️',
+    '.svg': '🖼️', '.zip': '📦', '.tar': '📦', '.gz': '📦',
+}
+
+
+def _file_ext(filename: str) -> str:
+    """Lower-cased extension, same as Path(filename).suffix.lower() without building a Path."""
+    base = filename[filename.rfind('/') + 1:]
+    dot = base.rfind('.')
+    if dot <= 0 or dot == len(base) - 1:
+        return ''
+    return base[dot:].lower()
+
+
+@functools.lru_cache(maxsize=256)
+def _get_file_icon_ext(ext: str) -> str:
+    """Get appropriate icon for a lower-cased file extension."""
+    return _FILE_ICONS.get(ext, '📄')
+
+
 def _get_file_icon(filename: str) -> str:
     """Get appropriate icon for file type."""
-    ext = Path(filename).suffix.lower()
-    icons = {
-        '.py': '🐍', '.js': '📜', '.ts': '📘', '.html': '🌐', '.css': '🎨',
-        '.json': '📋', '.md': '📝', '.txt': '📄', '.pdf': '📕', '.doc': '📄',
-        '.docx': '📄', '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️',
-        '.svg': '🖼️', '.zip': '📦', '.tar': '📦', '.gz': '📦',
-    }
-    return icons.get(ext, '📄')
+    return _get_file_icon_ext(_file_ext(filename))
+
+
+# Icons used by the button tree (a coarser set than _FILE_ICONS)
+_TREE_FILE_ICONS = {
+    '.py': '🐍',
+    **dict.fromkeys(['.js', '.ts', '.java', '.c', '.cpp'], '📜'),
+    **dict.fromkeys(['.md', '.txt', '.rst'], '📝'),
+    **dict.fromkeys(['.json', '.yaml', '.yml', '.xml'], '⚙️'),
+    **dict.fromkeys(['.png', '.jpg', '.jpeg', '.gif', '.svg'], '🖼️'),
+}
 
 
 def _render_file_tree(files: List[Dict], repo_url: str, current_path: str,
@@ -1209,8 +1460,11 @@ def _render_file_tree(files: List[Dict], repo_url: str, current_path: str,
     expanded_key = f"gh_expanded_{repo_id}"
     selected_key = f"gh_selected_{repo_id}"
     
-    # Sort: directories first, then files
-    sorted_files = sorted(files, key=lambda f: (0 if f.get("type") == "dir" else 1, f.get("name", "").lower()))
+    # Sort: directories first, then files (keys are normally precomputed at fetch time)
+    for f in files:
+        if "_sort_key" not in f:
+            f["_sort_key"] = _tree_sort_key(f)
+    sorted_files = sorted(files, key=itemgetter("_sort_key"))
     
     for file_info in sorted_files:
         name = file_info.get("name", "Unknown")
@@ -1230,7 +1484,7 @@ def _render_file_tree(files: List[Dict], repo_url: str, current_path: str,
                 else:
                     st.session_state[expanded_key].add(full_path)
                     # Fetch subdirectory contents
-                    _fetch_directory_contents(owner, repo, full_path, pat, repo_id)
+                    _fetch_directory_contents(owner, repo, full_path, pat)
                 st.rerun()
             
             # Show children if expanded
@@ -1252,21 +1506,8 @@ def _render_file_tree(files: List[Dict], repo_url: str, current_path: str,
                         st.markdown("</div>", unsafe_allow_html=True)
         else:
             # File - show select button
-            ext = Path(name).suffix.lower()
-            
             # Choose icon based on file type
-            if ext in ['.py', '.js', '.ts', '.java', '.c', '.cpp']:
-                icon = "🐍" if ext == '.py' else "📜"
-            elif ext in ['.md', '.txt', '.rst']:
-                icon = "📝"
-            elif ext in ['.json', '.yaml', '.yml', '.xml']:
-                icon = "⚙️"
-            elif ext in ['.png', '.jpg', '.jpeg', '.gif', '.svg']:
-                icon = "🖼️"
-            elif ext == '.pdf':
-                icon = "📄"
-            else:
-                icon = "📄"
+            icon = _TREE_FILE_ICONS.get(_file_ext(name), "📄")
             
             is_selected = st.session_state.get(selected_key) == full_path
             size_str = f" ({size / 1024:.1f}KB)" if size > 1024 else ""
@@ -1278,125 +1519,564 @@ def _render_file_tree(files: List[Dict], repo_url: str, current_path: str,
                 st.rerun()
 
 
-def _fetch_directory_contents(owner: str, repo: str, path: str, pat: Optional[str], repo_id: str):
-    """Fetch contents of a subdirectory and return as list."""
-    import requests
+def _tree_sort_key(f: Dict) -> tuple:
+    """Sort key for the file tree: directories first, then case-insensitive name."""
+    return (0 if f.get("type") == "dir" else 1, (f.get("name") or "").lower())
+
+
+def _pat_key(pat: Optional[str]) -> str:
+    """Stable digest of a PAT, used in cache keys instead of the token itself."""
+    if not pat:
+        return ""
+    return hashlib.sha256(pat.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _fetch_directory_listing(owner: str, repo: str, path: str, pat_key: str,
+                             _pat: Optional[str]) -> List[Dict]:
+    """
+    Fetch a directory listing from the GitHub contents API.
     
+    Cached process-wide for 5 minutes so every session browsing the same repo
+    shares one request. Raises on HTTP errors so failures are never cached.
+    The token itself is passed as the unhashed _pat; pat_key stands in for it
+    in the cache key.
+    """
     headers = {"Accept": "application/vnd.github.v3+json"}
-    if pat:
-        headers["Authorization"] = f"token {pat}"
-    
+    if _pat:
+        headers["Authorization"] = f"token {_pat}"
+    
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+    resp = _gh_session().get(url, headers=headers, timeout=10)
+    resp.raise_for_status()
+    
+    return [
+        {
+            "name": f.get("name"), 
+            "type": f.get("type"), 
+            "size": f.get("size", 0),
+            "path": f.get("path", ""),
+            "_sort_key": _tree_sort_key(f),
+        }
+        for f in _json_loads(resp.content) if isinstance(f, dict)
+    ]
+
+
+def _fetch_directory_contents(owner: str, repo: str, path: str, pat: Optional[str]):
+    """Fetch contents of a subdirectory and return as list."""
+    pat_key = _pat_key(pat)
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
-        resp = requests.get(url, headers=headers, timeout=10)
-        
-        if resp.status_code == 200:
-            files = resp.json()
-            return [
-                {
-                    "name": f.get("name"), 
-                    "type": f.get("type"), 
-                    "size": f.get("size", 0),
-                    "path": f.get("path", "")
-                }
-                for f in files if isinstance(f, dict)
-            ]
-        elif resp.status_code == 403:
+        # If this listing is already being prefetched, wait for it rather than
+        # issuing a duplicate request; the cached result is picked up below
+        future = _pending_listings.pop((owner, repo, path, pat_key), None)
+        if future is not None:
+            try:
+                future.result(timeout=PREFETCH_WAIT_SECONDS)
+            except Exception:
+                pass
+        return _fetch_directory_listing(owner, repo, path, pat_key, pat)
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 403:
             return [{"name": "(Rate limit reached)", "type": "file", "size": 0, "path": ""}]
-        else:
-            return [{"name": f"(Error: {resp.status_code})", "type": "file", "size": 0, "path": ""}]
+        status = e.response.status_code if e.response is not None else e
+        return [{"name": f"(Error: {status})", "type": "file", "size": 0, "path": ""}]
     except Exception as e:
         return [{"name": f"(Error: {e})", "type": "file", "size": 0, "path": ""}]
 
 
-def _render_file_preview(selected_path: str, owner: str, repo: str, 
-                         pat: Optional[str], repo_id: str):
-    """Render file content with appropriate formatting."""
-    import requests
-    import base64 as b64
+# Previewed by fetching download_url, so the API's base64 copy is never shown
+_DOWNLOAD_PREVIEW_EXTENSIONS = frozenset(IMAGE_EXTENSIONS + ARCHIVE_EXTENSIONS + ['.pdf', '.docx', '.doc'])
+
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def _fetch_file_data(owner: str, repo: str, path: str, pat_key: str,
+                     _pat: Optional[str], max_size: int) -> Dict:
+    """
+    Fetch a single file from the GitHub contents API.
     
-    content_cache_key = f"gh_content_{repo_id}"
+    Cached process-wide for 5 minutes, which also lets background prefetch
+    threads warm it. Raises on HTTP errors so failures are never cached.
+    Keyed on pat_key like _fetch_directory_listing.
+    """
+    headers = {"Accept": "application/vnd.github.v3+json"}
+    if _pat:
+        headers["Authorization"] = f"token {_pat}"
+    
+    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{path}"
+    resp = _gh_session().get(url, headers=headers, timeout=10)
+    resp.raise_for_status()
+    
+    data = _json_loads(resp.content)
+    size = data.get("size", 0)
+    
+    if size > max_size:
+        return {
+            "error": None,
+            "content": None,
+            "too_large": True,
+            "size": size,
+            "download_url": data.get("download_url", ""),
+            "sha": data.get("sha", "")
+        }
     
-    # Check cache first
-    if selected_path in st.session_state.get(content_cache_key, {}):
-        content_data = st.session_state[content_cache_key][selected_path]
+    if _file_ext(path) in _DOWNLOAD_PREVIEW_EXTENSIONS:
+        # Rendered from download_url; decoding the inline copy would be wasted
+        content = ""
+    elif data.get("encoding") == "base64":
+        # a2b_base64 skips the embedded newlines GitHub inserts every 60 chars
+        content = str(binascii.a2b_base64(data.get("content", "")), "utf-8", "ignore")
     else:
-        # Fetch file content
-        headers = {"Accept": "application/vnd.github.v3+json"}
-        if pat:
-            headers["Authorization"] = f"token {pat}"
+        content = data.get("content", "")
+    
+    return {
+        "error": None,
+        "content": content,
+        "too_large": False,
+        "size": size,
+        "download_url": data.get("download_url", ""),
+        "sha": data.get("sha", "")
+    }
+
+
+def _fetch_file_content(owner: str, repo: str, path: str, pat: Optional[str]) -> Dict:
+    """Fetch a file's content, returning an error dict instead of raising."""
+    try:
+        return _fetch_file_data(owner, repo, path, _pat_key(pat), pat, get_max_inline_size())
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 403:
+            return {"error": "GitHub API rate limit reached", "content": None}
+        status = e.response.status_code if e.response is not None else e
+        return {"error": f"Could not fetch file (HTTP {status})", "content": None}
+    except Exception as e:
+        return {"error": str(e), "content": None}
+
+
+def _prefetch_file_contents(owner: str, repo: str, files: List[Dict], pat: Optional[str]):
+    """
+    Warm the file cache for the first few files of a listing in the background.
+    
+    Fire-and-forget: results land in the _fetch_file_data cache, so the first
+    preview click is usually served without a network round-trip.
+    
+    Skipped without a PAT: unauthenticated calls share the server IP's
+    60/hour GitHub limit with every user, so none are spent speculatively.
+    """
+    if not pat:
+        return
+    max_size = get_max_inline_size()
+    candidates = [
+        f.get("path") or f.get("name") for f in files
+        if f.get("type") != "dir" and 0 < f.get("size", 0) <= max_size
+    ]
+    pat_key = _pat_key(pat)
+    for path in candidates[:PREFETCH_FILE_COUNT]:
+        if path:
+            _prefetch_pool.submit(_fetch_file_data, owner, repo, path, pat_key, pat, max_size)
+
+
+def _prefetch_directory_listings(owner: str, repo: str, files: List[Dict], pat: Optional[str]):
+    """
+    Warm the listing cache for the first few subdirectories in the background.
+    
+    Futures are tracked in _pending_listings so a click on a directory that
+    is still loading waits for it instead of fetching it twice. Skipped
+    without a PAT, like _prefetch_file_contents.
+    """
+    if not pat:
+        return
+    for key in [k for k, fut in _pending_listings.items() if fut.done()]:
+        _pending_listings.pop(key, None)
+    
+    pat_key = _pat_key(pat)
+    dirs = [f.get("path") or f.get("name") for f in files if f.get("type") == "dir"]
+    for path in dirs[:PREFETCH_DIR_COUNT]:
+        key = (owner, repo, path, pat_key)
+        if path and key not in _pending_listings:
+            _pending_listings[key] = _prefetch_pool.submit(
+                _fetch_directory_listing, owner, repo, path, pat_key, pat
+            )
+
+
+# Entries below this size are inflated with libdeflate when it is installed
+FAST_ZIP_READ_LIMIT = 2 * 1024 * 1024
+
+# Text/code entries inside archives are previewed up to this many bytes
+ZIP_PREVIEW_BYTES = 50000
+
+# Preview kinds that only show the first ZIP_PREVIEW_BYTES of an entry
+_TEXT_PREVIEW_KINDS = frozenset(('text', 'html', 'lang', 'json'))
+
+
+def _decode_text_prefix(data: bytes, max_chars: int = 50000) -> str:
+    """
+    Decode at most ``max_chars`` characters from the start of ``data``.
+    
+    UTF-8 needs at most 4 bytes per character, so only that many bytes are
+    decoded, straight from a memoryview without copying the buffer first.
+    """
+    return str(memoryview(data)[:max_chars * 4], 'utf-8', 'ignore')[:max_chars]
+
+
+def _read_zip_capped(zf, name: str, pwd: Optional[bytes], cap: int) -> bytes:
+    """Read at most ``cap`` decompressed bytes of a ZIP member."""
+    with zf.open(name, pwd=pwd) as fh:
+        return fh.read(cap)
+
+
+def _fast_zip_read(zf, name: str, pwd: Optional[bytes] = None) -> bytes:
+    """
+    Read a ZIP member, using libdeflate for small unencrypted DEFLATE entries.
+    
+    Falls back to ``zf.read`` when libdeflate is not installed, the entry is
+    stored/encrypted/large, or anything about the fast path fails.
+    """
+    
+    info = zf.getinfo(name)
+    if (deflate is None
+            or info.compress_type != zipfile.ZIP_DEFLATED
+            or info.flag_bits & 0x1
+            or info.file_size >= FAST_ZIP_READ_LIMIT):
+        return zf.read(name, pwd=pwd)
+    
+    try:
+        # zf.open() parses the local header and leaves the shared file object
+        # positioned at the start of the compressed stream
+        with zf.open(info) as fh:
+            raw = fh._fileobj.read(info.compress_size)
+        data = deflate.deflate_decompress(raw, info.file_size)
+        if zlib.crc32(data) != info.CRC:
+            raise zipfile.BadZipFile(f"CRC mismatch for {name}")
+        return data
+    except Exception as e:
+        logger.debug(f"libdeflate read failed for {name}, using zipfile: {e}")
+        return zf.read(name, pwd=pwd)
+
+
+# Speculative decompression of archive entries next to the one being previewed
+ZIP_PREFETCH_NEIGHBOURS = 1
+ZIP_PREFETCH_MAX_SIZE = 1024 * 1024
+ZIP_PREFETCH_CACHE_SIZE = 8
+
+
+def _read_zip_member(zip_path: str, name: str, pwd: Optional[bytes],
+                     cap: Optional[int] = None) -> bytes:
+    """
+    Read one member from a fresh ZipFile (ZipFile objects are not thread-safe).
+    
+    With ``cap`` set only that many decompressed bytes are read.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        if cap is not None:
+            return _read_zip_capped(zf, name, pwd, cap)
+        return _fast_zip_read(zf, name, pwd)
+
+
+def _take_zip_prefetch(cache: OrderedDict, key: tuple) -> Optional[bytes]:
+    """
+    Return prefetched bytes for ``key`` if a prefetch was scheduled and has finished.
+    
+    A read that is still queued or running is cancelled (where possible) and
+    dropped instead of waited on; the caller reads the entry directly from the
+    open archive, which is at least as fast.
+    """
+    future = cache.get(key)
+    if future is None:
+        return None
+    if not future.done():
+        future.cancel()
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    try:
+        return future.result()
+    except Exception as e:
+        logger.debug(f"ZIP prefetch failed for {key[-1]}: {e}")
+        del cache[key]
+        return None
+
+
+def _zip_neighbours(zf, selected_name: str) -> List[zipfile.ZipInfo]:
+    """Up to ZIP_PREFETCH_NEIGHBOURS file entries on each side of ``selected_name``."""
+    infos = zf.infolist()
+    try:
+        # Identity match against the same ZipInfo objects, so this runs in C
+        idx = infos.index(zf.getinfo(selected_name))
+    except (KeyError, ValueError):
+        return []
+    
+    found = []
+    for step in (-1, 1):
+        pos, taken = idx + step, 0
+        while 0 <= pos < len(infos) and taken < ZIP_PREFETCH_NEIGHBOURS:
+            if not infos[pos].filename.endswith('/'):
+                found.append(infos[pos])
+                taken += 1
+            pos += step
+    return found
+
+
+def _schedule_zip_prefetch(cache: OrderedDict, zf, zip_source: str, content_sha: str,
+                           archive_path: str, selected_name: str, pwd: Optional[bytes]):
+    """
+    Queue background reads of the entries listed next to ``selected_name``.
+    
+    Futures are kept in ``cache`` (an LRU of ZIP_PREFETCH_CACHE_SIZE entries,
+    keyed by (archive path, blob sha, member name)) so the next preview can
+    pick them up; the sha keeps a re-pushed archive from serving old bytes.
+    
+    Downloaded archives are read through a fresh ZipFile per entry. Range-read
+    archives only prefetch capped text previews, read through the shared
+    ``zf`` (its reads are serialized by ZipFile's lock), so no extra central
+    directory fetch is made and binary entries are only transferred when opened.
+    """
+    remote = _is_remote_zip(zip_source)
+    for info in _zip_neighbours(zf, selected_name):
+        name = info.filename
+        key = (archive_path, content_sha, name)
+        if key in cache:
+            continue
+        if _PREVIEW_HANDLERS.get(_file_ext(name)) in _TEXT_PREVIEW_KINDS:
+            # Text previews are capped, so large text entries are cheap to prefetch too
+            cap = ZIP_PREVIEW_BYTES + 1
+        elif not remote and info.file_size < ZIP_PREFETCH_MAX_SIZE:
+            cap = None
+        else:
+            continue
+        if remote:
+            cache[key] = _zip_read_pool.submit(_read_zip_capped, zf, name, pwd, cap)
+        else:
+            cache[key] = _zip_read_pool.submit(_read_zip_member, zip_source, name, pwd, cap)
+        while len(cache) > ZIP_PREFETCH_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+# Rows shown in the archive listing; very large archives are truncated
+ZIP_MAX_LISTING = 2000
+
+# Archives with at most this many files are listed as button rows instead of a table,
+# and up to ZIP_SELECTBOX_MAX files are picked from a selectbox
+ZIP_BUTTON_LIST_MAX = 8
+ZIP_SELECTBOX_MAX = 50
+
+
+# Minimum bytes fetched per HTTP Range request when reading a remote archive
+RANGE_READ_BLOCK = 256 * 1024
+
+
+class _RangeHTTPFile:
+    """
+    Read-only, seekable file backed by HTTP Range requests.
+    
+    Lets zipfile read the central directory and the previewed members of a
+    remote archive without downloading the rest of it. The first request
+    fetches the tail of the file (end-of-central-directory record and usually
+    the whole central directory) and learns the size from Content-Range.
+    Reads are then served from one cached block of at least RANGE_READ_BLOCK
+    bytes. Raises OSError if the server does not answer with 206.
+    """
+    
+    def __init__(self, url: str):
+        self.url = url
+        self._pos = 0
+        resp = self._get(f"bytes=-{RANGE_READ_BLOCK}")
+        # Content-Range: bytes <start>-<end>/<total>
+        self.size = int(resp.headers["Content-Range"].rsplit("/", 1)[1])
+        self._block = resp.content
+        self._block_start = self.size - len(self._block)
+    
+    def _get(self, byte_range: str):
+        resp = _gh_session().get(
+            self.url, headers={"Range": byte_range, "Accept-Encoding": "identity"}, timeout=30
+        )
+        if resp.status_code != 206:
+            raise OSError(f"Range request not supported (HTTP {resp.status_code})")
+        return resp
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+    
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self._pos
+        n = min(n, self.size - self._pos)
+        if n <= 0:
+            return b""
         
+        offset = self._pos - self._block_start
+        if offset < 0 or offset + n > len(self._block):
+            end = min(self.size, self._pos + max(n, RANGE_READ_BLOCK)) - 1
+            self._block = self._get(f"bytes={self._pos}-{end}").content
+            self._block_start = self._pos
+            offset = 0
+        
+        data = self._block[offset:offset + n]
+        self._pos += len(data)
+        return data
+    
+    def close(self):
+        self._block = b""
+
+
+def _is_remote_zip(zip_source: str) -> bool:
+    """True when ``zip_source`` is a URL read through _RangeHTTPFile rather than a temp file."""
+    return zip_source.startswith(("https://", "http://"))
+
+
+# Lifetime of opened archives and their listings; downloaded temp archives
+# older than this are deleted by _download_zip
+ZIP_CACHE_TTL = 300
+_ZIP_TEMP_PREFIX = "gh_zip_"
+
+
+@st.cache_resource(show_spinner=False, max_entries=16, ttl=ZIP_CACHE_TTL)
+def _open_zip(zip_source: str, content_sha: str = ""):
+    """
+    Open an archive once and share the parsed ZipFile across reruns.
+    
+    ``zip_source`` is either a downloaded temp file or, when the server
+    honours byte ranges, the archive URL itself. ZipFile only reads the
+    central directory up front and seeks to members on demand, so the payload
+    stays on disk or on the server. Reads go through ZipFile's locked shared
+    file handle.
+    
+    ``content_sha`` is GitHub's blob sha. A branch download URL stays the same
+    when the archive is pushed again, so the sha keeps a stale central
+    directory from being paired with new bytes.
+    """
+    if _is_remote_zip(zip_source):
+        return zipfile.ZipFile(_RangeHTTPFile(zip_source), 'r')
+    return zipfile.ZipFile(zip_source, 'r')
+
+
+def _resolve_zip_source(download_url: str, content_sha: str = "") -> Optional[str]:
+    """
+    Decide how an archive is read: the URL itself when Range requests work,
+    otherwise a full download to a temp file (None if that fails too).
+    """
+    try:
+        _open_zip(download_url, content_sha)
+        return download_url
+    except Exception as e:
+        logger.debug(f"Range reads unavailable for {download_url}, downloading instead: {e}")
+    return _download_zip(download_url)
+
+
+def _sweep_zip_downloads():
+    """Delete downloaded archives whose _open_zip/_build_zip_index entries have expired."""
+    cutoff = time.time() - ZIP_CACHE_TTL
+    for path in Path(tempfile.gettempdir()).glob(f"{_ZIP_TEMP_PREFIX}*.zip"):
         try:
-            url = f"https://api.github.com/repos/{owner}/{repo}/contents/{selected_path}"
-            resp = requests.get(url, headers=headers, timeout=10)
-            
-            if resp.status_code == 200:
-                data = resp.json()
-                size = data.get("size", 0)
-                
-                if size > get_max_inline_size():
-                    content_data = {
-                        "error": None,
-                        "content": None,
-                        "too_large": True,
-                        "size": size,
-                        "download_url": data.get("download_url", "")
-                    }
-                else:
-                    if data.get("encoding") == "base64":
-                        content = b64.b64decode(data.get("content", "")).decode("utf-8", errors="ignore")
-                    else:
-                        content = data.get("content", "")
-                    
-                    content_data = {
-                        "error": None,
-                        "content": content,
-                        "too_large": False,
-                        "size": size,
-                        "download_url": data.get("download_url", "")
-                    }
-            elif resp.status_code == 403:
-                content_data = {"error": "GitHub API rate limit reached", "content": None}
-            else:
-                content_data = {"error": f"Could not fetch file (HTTP {resp.status_code})", "content": None}
-                
-        except Exception as e:
-            content_data = {"error": str(e), "content": None}
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass  # Already gone, or still open on a platform that forbids unlinking
+
+
+def _download_zip(download_url: str) -> Optional[str]:
+    """
+    Stream an archive to a temp file and return its path, or None on failure.
+    
+    Each download gets its own file, so the path doubles as the cache key for
+    _open_zip/_build_zip_index. Files older than ZIP_CACHE_TTL are swept first.
+    """
+    _sweep_zip_downloads()
+    with _gh_session().get(download_url, timeout=30, stream=True) as resp:
+        if resp.status_code != 200:
+            return None
+        resp.raw.decode_content = True
+        with tempfile.NamedTemporaryFile(delete=False, prefix=_ZIP_TEMP_PREFIX, suffix=".zip") as tmp:
+            try:
+                shutil.copyfileobj(resp.raw, tmp)
+            except Exception:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+            return tmp.name
+
+
+@st.cache_data(show_spinner=False, max_entries=32, ttl=ZIP_CACHE_TTL)
+def _build_zip_index(zip_source: str, content_sha: str = ""):
+    """
+    Build the archive listing columns and row-index -> member-name map.
+    
+    Memoized on the archive source (temp file path or URL) and blob sha, as
+    in _open_zip, so selection clicks and other reruns do not walk the central
+    directory again. Columns are returned as parallel lists
+    so the DataFrame is built column-wise rather than inferred row by row.
+    
+    Only the first ZIP_MAX_LISTING entries get rows; the rest are still
+    counted and sized so the caption can report the whole archive.
+    
+    Returns:
+        Tuple of ({column name: values}, {row index: member name},
+        total uncompressed size, total number of files)
+    """
+    icons = []
+    names = []
+    paths = []
+    sizes = []
+    file_map = {}
+    
+    zf = _open_zip(zip_source, content_sha)
+    # Same test as ZipInfo.is_dir(), without a method call per entry
+    infos = [i for i in zf.infolist() if not i.filename.endswith('/')]
+    
+    total_files = len(infos)
+    total_size = sum(info.file_size for info in infos)
+    
+    for info in infos[:ZIP_MAX_LISTING]:
+        size = info.file_size
+        fname = info.filename
+        # Plain string ops: constructing a Path per entry is much slower
+        slash = fname.rfind('/')
+        basename = fname[slash + 1:] if slash >= 0 else fname
         
-        # Cache the result
-        if content_cache_key not in st.session_state:
-            st.session_state[content_cache_key] = {}
-        st.session_state[content_cache_key][selected_path] = content_data
+        file_map[len(names)] = fname
+        icons.append(_get_file_icon_ext(_file_ext(basename)))
+        names.append(basename)
+        paths.append(fname if slash >= 0 else "—")
+        sizes.append(f"{size / 1024:.1f} KB" if size > 0 else "—")
+    
+    columns = {"": icons, "Name": names, "Path": paths, "Size": sizes}
+    return columns, file_map, total_size, total_files
+
+
+def _render_file_preview(selected_path: str, owner: str, repo: str, 
+                         pat: Optional[str], repo_id: str):
+    """Render file content with appropriate formatting."""
+    # Served from the process-wide _fetch_file_data cache after the first fetch
+    content_data = _fetch_file_content(owner, repo, selected_path, pat)
     
     # Display
     filename = Path(selected_path).name
-    ext = Path(filename).suffix.lower()
+    ext = _file_ext(filename)
     size = content_data.get("size", 0)
     download_url = content_data.get("download_url", "")
+    content_sha = content_data.get("sha", "")
     
     # File info panel (like DOCX viewer)
-    size_str = f"{size / 1024:.1f} KB" if size > 0 else "—"
     file_type = ext.upper().replace(".", "") if ext else "File"
-    
-    info_html = f'''
-    <div style="background: #2d2d2d; border-radius: 6px; padding: 10px 15px; margin-bottom: 10px; 
-                display: flex; flex-wrap: wrap; gap: 20px; align-items: center; font-size: 13px; color: #ccc;">
-        <div style="display: flex; align-items: center; gap: 6px;">
-            <span style="color: #888;">📄 File:</span>
-            <span style="color: #fff; font-weight: 500;">{filename}</span>
-        </div>
-        <div style="display: flex; align-items: center; gap: 6px;">
-            <span style="color: #888;">📁 Type:</span>
-            <span style="color: #fff; font-weight: 500;">{file_type}</span>
-        </div>
-        <div style="display: flex; align-items: center; gap: 6px;">
-            <span style="color: #888;">📊 Size:</span>
-            <span style="color: #fff; font-weight: 500;">{size_str}</span>
-        </div>
-        {f'<a href="{download_url}" target="_blank" style="color: #4da6ff; text-decoration: none;">📥 Download</a>' if download_url else ''}
-    </div>
-    '''
-    st.components.v1.html(info_html, height=50)
+    render_file_info_panel(filename, file_type, size, download_url=download_url)
     
     if content_data.get("error"):
         st.error(content_data["error"])
@@ -1427,11 +2107,9 @@ def _render_file_preview(selected_path: str, owner: str, repo: str,
     elif ext == '.pdf':
         # PDF file - fetch and use PDF viewer
         if download_url:
-            import requests
-            
             with st.spinner("Fetching PDF..."):
                 try:
-                    resp = requests.get(download_url, timeout=30)
+                    resp = _gh_session().get(download_url, timeout=30)
                     if resp.status_code == 200:
                         # Use the unified PDF content viewer with view modes
                         render_pdf_content(resp.content, filename, unique_key=f"gh_{abs(hash(download_url))}")
@@ -1446,11 +2124,9 @@ def _render_file_preview(selected_path: str, owner: str, repo: str,
     elif ext in ['.docx', '.doc']:
         # DOCX file - fetch and reuse existing DOCX viewer
         if download_url:
-            import requests
-            
             with st.spinner("Fetching document..."):
                 try:
-                    resp = requests.get(download_url, timeout=30)
+                    resp = _gh_session().get(download_url, timeout=30)
                     if resp.status_code == 200:
                         # Use the shared DOCX viewer
                         render_docx_viewer(resp.content, filename, unique_key=f"gh_{abs(hash(download_url))}")
@@ -1464,194 +2140,214 @@ def _render_file_preview(selected_path: str, owner: str, repo: str,
             st.info("📄 DOCX file - no download URL available")
     elif ext in ['.zip', '.7z', '.rar', '.tar', '.gz']:
         # Archive files - fetch and display contents with drill-down
-        import requests
-        import zipfile
-        import io
-        import pandas as pd
-        
         if ext == '.zip' and download_url:
             # Session state keys for ZIP navigation
-            zip_cache_key = f"gh_zip_{repo_id}_{selected_path}"
+            zip_cache_key = f"gh_zip_{repo_id}_{selected_path}_{content_sha}"
             zip_file_key = f"gh_zip_file_{repo_id}_{selected_path}"
+            # Widget key prefix for this archive, hashed once per render
+            archive_key = abs(hash((repo_id, selected_path)))
+            
+            # A downloaded archive may have been swept since; fetch it again
+            cached_source = st.session_state.get(zip_cache_key)
+            if cached_source and not _is_remote_zip(cached_source) and not os.path.exists(cached_source):
+                del st.session_state[zip_cache_key]
             
             # Fetch ZIP from GitHub raw URL
             if zip_cache_key not in st.session_state:
                 with st.spinner("Fetching archive..."):
                     try:
-                        resp = requests.get(download_url, timeout=30)
-                        if resp.status_code == 200:
-                            st.session_state[zip_cache_key] = resp.content
-                        else:
-                            st.session_state[zip_cache_key] = None
+                        # Only a URL or temp file path is kept in the session, not the archive bytes
+                        st.session_state[zip_cache_key] = _resolve_zip_source(download_url, content_sha)
                     except Exception:
                         st.session_state[zip_cache_key] = None
             
-            zip_data = st.session_state.get(zip_cache_key)
+            zip_source = st.session_state.get(zip_cache_key)
             selected_zip_file = st.session_state.get(zip_file_key)
             
-            if zip_data:
+            if zip_source and (_is_remote_zip(zip_source) or os.path.exists(zip_source)):
                 try:
-                    with zipfile.ZipFile(io.BytesIO(zip_data), 'r') as zf:
-                        # Check if ZIP archive is password protected
-                        is_encrypted = any(info.flag_bits & 0x1 for info in zf.infolist())
-                        known_password = "ictkerala.org" if is_encrypted else None
+                    # Parsed once per archive and shared across reruns
+                    zf = _open_zip(zip_source, content_sha)
+                    # Check if ZIP archive is password protected
+                    is_encrypted = any(info.flag_bits & 0x1 for info in zf.infolist())
+                    known_password = "ictkerala.org" if is_encrypted else None
+                    
+                    if is_encrypted:
+                        try:
+                            zf.setpassword(known_password.encode())
+                        except Exception:
+                            pass
+                    
+                    if selected_zip_file:
+                        # === DRILL-DOWN VIEW: Show selected file from ZIP ===
+                        st.markdown("#### 📄 File from Archive")
                         
-                        if is_encrypted:
-                            try:
-                                zf.setpassword(known_password.encode())
-                            except Exception:
-                                pass
+                        # Back button
+                        if st.button("🔙 Back to Archive", key=f"zip_back_{archive_key}"):
+                            del st.session_state[zip_file_key]
+                            st.rerun()
                         
-                        if selected_zip_file:
-                            # === DRILL-DOWN VIEW: Show selected file from ZIP ===
-                            st.markdown("#### 📄 File from Archive")
+                        # Get file info
+                        try:
+                            file_info = zf.getinfo(selected_zip_file)
+                            file_size = file_info.file_size
+                            file_name = Path(selected_zip_file).name
+                            file_ext = _file_ext(file_name)
                             
-                            # Back button
-                            if st.button("🔙 Back to Archive", key=f"zip_back_{repo_id}"):
-                                del st.session_state[zip_file_key]
-                                st.rerun()
+                            # Info panel for file inside ZIP
+                            file_type_str = file_ext.upper().replace(".", "") if file_ext else "File"
+                            render_file_info_panel(file_name, file_type_str, file_size,
+                                                   extra_info={"📦 From": filename})
                             
-                            # Get file info
+                            # Read file content
                             try:
-                                file_info = zf.getinfo(selected_zip_file)
-                                file_size = file_info.file_size
-                                file_name = Path(selected_zip_file).name
-                                file_ext = Path(file_name).suffix.lower()
+                                pwd = known_password.encode() if known_password else None
+                                kind = _PREVIEW_HANDLERS.get(file_ext)
+                                is_text_entry = kind in _TEXT_PREVIEW_KINDS
+                                
+                                prefetch_cache = st.session_state.setdefault(f"zip_prefetch_{repo_id}", OrderedDict())
+                                prefetched = _take_zip_prefetch(prefetch_cache, (selected_path, content_sha, selected_zip_file))
+                                
+                                if prefetched is not None:
+                                    file_content = prefetched
+                                    truncated = is_text_entry and len(file_content) > ZIP_PREVIEW_BYTES
+                                    if truncated:
+                                        file_content = file_content[:ZIP_PREVIEW_BYTES]
+                                elif is_text_entry:
+                                    # Text previews are capped, so only inflate what gets shown
+                                    file_content = _read_zip_capped(zf, selected_zip_file, pwd, ZIP_PREVIEW_BYTES + 1)
+                                    truncated = len(file_content) > ZIP_PREVIEW_BYTES
+                                    file_content = file_content[:ZIP_PREVIEW_BYTES]
+                                else:
+                                    file_content = _fast_zip_read(zf, selected_zip_file, pwd)
+                                    truncated = False
                                 
-                                # Info panel for file inside ZIP
-                                size_str = f"{file_size / 1024:.1f} KB" if file_size > 0 else "—"
-                                file_type_str = file_ext.upper().replace(".", "") if file_ext else "File"
+                                # Decompress the neighbouring entries while the user reads this one
+                                _schedule_zip_prefetch(prefetch_cache, zf, zip_source, content_sha,
+                                                       selected_path, selected_zip_file, pwd)
                                 
-                                info_html = f'''
-                                <div style="background: #2d2d2d; border-radius: 6px; padding: 10px 15px; margin: 10px 0; 
-                                            display: flex; flex-wrap: wrap; gap: 20px; align-items: center; font-size: 13px; color: #ccc;">
-                                    <div style="display: flex; align-items: center; gap: 6px;">
-                                        <span style="color: #888;">📄 File:</span>
-                                        <span style="color: #fff; font-weight: 500;">{file_name}</span>
-                                    </div>
-                                    <div style="display: flex; align-items: center; gap: 6px;">
-                                        <span style="color: #888;">📁 Type:</span>
-                                        <span style="color: #fff; font-weight: 500;">{file_type_str}</span>
-                                    </div>
-                                    <div style="display: flex; align-items: center; gap: 6px;">
-                                        <span style="color: #888;">📊 Size:</span>
-                                        <span style="color: #fff; font-weight: 500;">{size_str}</span>
-                                    </div>
-                                    <div style="display: flex; align-items: center; gap: 6px;">
-                                        <span style="color: #888;">📦 From:</span>
-                                        <span style="color: #fff; font-weight: 500;">{filename}</span>
-                                    </div>
-                                </div>
-                                '''
-                                st.components.v1.html(info_html, height=50)
+                                # Widget keys for the viewers below, computed once per preview
+                                zip_key = abs(hash(selected_zip_file))
+                                viewer_key = f"zip_{archive_key}_{zip_key}"
+                                magic_viewer_key = f"zip_magic_{archive_key}_{zip_key}"
                                 
-                                # Read file content
-                                try:
-                                    file_content = zf.read(selected_zip_file, pwd=known_password.encode() if known_password else None)
+                                # Render based on file type
+                                if kind == 'text':
+                                    text_content = _decode_text_prefix(file_content)
+                                    if file_ext == '.md':
+                                        st.markdown(text_content)
+                                    else:
+                                        st.code(text_content, language=None)
+                                elif kind == 'html':
+                                    # HTML file - render with HTML viewer
+                                    text_content = file_content.decode('utf-8', errors='ignore')
+                                    render_html_viewer(text_content, file_name, unique_key=viewer_key)
+                                elif kind == 'lang':
+                                    text_content = _decode_text_prefix(file_content)
+                                    st.code(text_content, language=LANGUAGE_MAP[file_ext])
+                                elif kind == 'image':
+                                    render_image_content(file_content, caption=file_name)
+                                elif kind == 'json':
+                                    text_content = _decode_text_prefix(file_content)
+                                    st.code(text_content, language='json')
+                                elif kind == 'pdf':
+                                    # Use the unified PDF content viewer with view modes
+                                    if len(file_content) < 100:
+                                        st.warning(f"⚠️ PDF appears empty or corrupted ({len(file_content)} bytes)")
+                                    else:
+                                        render_pdf_content(file_content, file_name, unique_key=viewer_key)
+                                elif kind == 'docx':
+                                    # Use the reusable DOCX viewer
+                                    render_docx_viewer(file_content, file_name, unique_key=viewer_key)
+                                else:
+                                    # Unknown extension - try magic byte detection
+                                    detected_type = detect_file_type(file_content[:MAGIC_SNIFF_BYTES])
                                     
-                                    # Render based on file type
-                                    if file_ext in ['.txt', '.md', '.csv', '.log']:
-                                        text_content = file_content.decode('utf-8', errors='ignore')
-                                        if file_ext == '.md':
-                                            st.markdown(text_content)
-                                        else:
-                                            st.code(text_content[:50000], language=None)
-                                    elif file_ext in HTML_EXTENSIONS:
-                                        # HTML file - render with HTML viewer
-                                        text_content = file_content.decode('utf-8', errors='ignore')
-                                        render_html_viewer(text_content, file_name, unique_key=f"zip_{abs(hash(selected_zip_file))}")
-                                    elif file_ext in LANGUAGE_MAP:
-                                        text_content = file_content.decode('utf-8', errors='ignore')
-                                        st.code(text_content[:50000], language=LANGUAGE_MAP[file_ext])
-                                    elif file_ext in IMAGE_EXTENSIONS:
+                                    if detected_type == '.pdf':
+                                        render_pdf_content(file_content, file_name, unique_key=magic_viewer_key)
+                                    elif detected_type in IMAGE_EXTENSIONS:
                                         render_image_content(file_content, caption=file_name)
-                                    elif file_ext == '.json':
-                                        text_content = file_content.decode('utf-8', errors='ignore')
-                                        st.code(text_content, language='json')
-                                    elif file_ext == '.pdf':
-                                        # Use the unified PDF content viewer with view modes
-                                        if len(file_content) < 100:
-                                            st.warning(f"⚠️ PDF appears empty or corrupted ({len(file_content)} bytes)")
-                                        else:
-                                            render_pdf_content(file_content, file_name, unique_key=f"zip_{abs(hash(selected_zip_file))}")
-                                    elif file_ext in ['.docx', '.doc']:
-                                        # Use the reusable DOCX viewer
-                                        render_docx_viewer(file_content, file_name, unique_key=f"zip_{abs(hash(selected_zip_file))}")
+                                    elif detected_type in ['.docx', '.doc']:
+                                        render_docx_viewer(file_content, file_name, unique_key=magic_viewer_key)
+                                    elif detected_type == '.txt':
+                                        # Detected as text; decode only the part that is shown
+                                        text_content = _decode_text_prefix(file_content)
+                                        st.code(text_content, language=None)
                                     else:
-                                        # Unknown extension - try magic byte detection
-                                        detected_type = detect_file_type(file_content)
-                                        
-                                        if detected_type == '.pdf':
-                                            render_pdf_content(file_content, file_name, unique_key=f"zip_magic_{abs(hash(selected_zip_file))}")
-                                        elif detected_type in IMAGE_EXTENSIONS:
-                                            render_image_content(file_content, caption=file_name)
-                                        elif detected_type in ['.docx', '.doc']:
-                                            render_docx_viewer(file_content, file_name, unique_key=f"zip_magic_{abs(hash(selected_zip_file))}")
-                                        elif detected_type == '.txt':
-                                            # Detected as text
-                                            text_content = file_content.decode('utf-8', errors='ignore')
-                                            st.code(text_content[:50000], language=None)
-                                        else:
-                                            # Unknown binary
-                                            st.info(f"📦 Binary file ({file_type_str}) - cannot display inline")
-                                except Exception as e:
-                                    st.error(f"❌ Error reading file: {e}")
-                            except KeyError:
-                                st.error(f"❌ File not found in archive: {selected_zip_file}")
-                                del st.session_state[zip_file_key]
-                        else:
-                            # === ARCHIVE LIST VIEW ===
-                            st.markdown("#### 📦 Archive Contents")
+                                        # Unknown binary
+                                        st.info(f"📦 Binary file ({file_type_str}) - cannot display inline")
+                                
+                                if truncated:
+                                    st.caption(f"✂️ Preview truncated at {ZIP_PREVIEW_BYTES / 1024:.1f} KB of {file_size / 1024:.1f} KB")
+                            except Exception as e:
+                                st.error(f"❌ Error reading file: {e}")
+                        except KeyError:
+                            st.error(f"❌ File not found in archive: {selected_zip_file}")
+                            del st.session_state[zip_file_key]
+                    else:
+                        # === ARCHIVE LIST VIEW ===
+                        st.markdown("#### 📦 Archive Contents")
+                        
+                        if is_encrypted:
+                            st.info("🔐 Password-protected archive")
+                            st.success("✅ Unlocked with known password")
+                        
+                        # Build file list (memoized per archive across reruns)
+                        columns, file_map, total_size, total_files = _build_zip_index(zip_source, content_sha)
+                        
+                        if file_map and len(file_map) <= ZIP_BUTTON_LIST_MAX:
+                            # Small archives: plain button rows, no DataFrame/grid component
+                            for idx, member in file_map.items():
+                                col1, col2, col3 = st.columns([1, 4, 2])
+                                col1.write(columns[""][idx])
+                                # st.text, not st.write: member names are not Markdown (e.g. __init__.py)
+                                col2.text(f"{columns['Name'][idx]} ({columns['Size'][idx]})")
+                                if col3.button("Preview", key=f"zip_btn_{archive_key}_{idx}"):
+                                    st.session_state[zip_file_key] = member
+                                    st.rerun()
                             
-                            if is_encrypted:
-                                st.info("🔐 Password-protected archive")
-                                st.success("✅ Unlocked with known password")
+                            st.caption(f"📊 {total_files} file(s) • Total: {total_size / 1024:.1f} KB • 👆 Click to preview")
+                        elif file_map and len(file_map) <= ZIP_SELECTBOX_MAX:
+                            # Mid-sized archives: one selectbox widget instead of a grid
+                            choice = st.selectbox(
+                                "File",
+                                options=[None, *file_map],
+                                format_func=lambda i: "Select a file to preview…" if i is None
+                                    else f"{columns[''][i]} {columns['Path'][i] if columns['Path'][i] != '—' else columns['Name'][i]} ({columns['Size'][i]})",
+                                key=f"zip_select_{archive_key}",
+                                label_visibility="collapsed"
+                            )
+                            if choice is not None:
+                                st.session_state[zip_file_key] = file_map[choice]
+                                st.rerun()
                             
-                            # Build file list
-                            file_list = []
-                            file_map = {}
-                            total_size = 0
+                            st.caption(f"📊 {total_files} file(s) • Total: {total_size / 1024:.1f} KB")
+                        elif file_map:
+                            df = pd.DataFrame(columns)
                             
-                            for i, info in enumerate(zf.infolist()):
-                                if not info.is_dir():
-                                    size = info.file_size
-                                    total_size += size
-                                    fname = info.filename
-                                    fext = Path(fname).suffix.lower()
-                                    icon = _get_file_icon(fname)
-                                    
-                                    file_list.append({
-                                        "": icon,
-                                        "Name": Path(fname).name,
-                                        "Path": fname if "/" in fname else "—",
-                                        "Size": f"{size / 1024:.1f} KB" if size > 0 else "—",
-                                    })
-                                    file_map[len(file_list) - 1] = fname
+                            event = st.dataframe(
+                                df,
+                                hide_index=True,
+                                on_select="rerun",
+                                selection_mode="single-row",
+                                key=f"zip_table_{archive_key}",
+                                width="stretch"
+                            )
+                            
+                            # Handle selection
+                            if event and event.selection and len(event.selection.rows) > 0:
+                                selected_idx = event.selection.rows[0]
+                                selected_file_in_zip = file_map.get(selected_idx)
+                                if selected_file_in_zip:
+                                    st.session_state[zip_file_key] = selected_file_in_zip
+                                    st.rerun()
+                            
+                            st.caption(f"📊 {total_files} file(s) • Total: {total_size / 1024:.1f} KB • 👆 Click to preview")
+                            if total_files > len(file_map):
+                                st.caption(f"Showing first {len(file_map)} of {total_files} entries — download the archive to view more")
+                        else:
+                            st.info("📭 Empty archive")
                             
-                            if file_list:
-                                df = pd.DataFrame(file_list)
-                                
-                                event = st.dataframe(
-                                    df,
-                                    hide_index=True,
-                                    on_select="rerun",
-                                    selection_mode="single-row",
-                                    key=f"zip_table_{repo_id}_{selected_path}",
-                                    width="stretch"
-                                )
-                                
-                                # Handle selection
-                                if event and event.selection and len(event.selection.rows) > 0:
-                                    selected_idx = event.selection.rows[0]
-                                    selected_file_in_zip = file_map.get(selected_idx)
-                                    if selected_file_in_zip:
-                                        st.session_state[zip_file_key] = selected_file_in_zip
-                                        st.rerun()
-                                
-                                st.caption(f"📊 {len(file_list)} file(s) • Total: {total_size / 1024:.1f} KB • 👆 Click to preview")
-                            else:
-                                st.info("📭 Empty archive")
-                                
                 except zipfile.BadZipFile:
                     st.error("❌ Invalid or corrupted ZIP file")
                 except Exception as e:
@@ -1667,72 +2363,104 @@ def _render_file_preview(selected_path: str, owner: str, repo: str,
     else:
         # Unknown extension - try magic byte detection
         if download_url:
-            import requests
-            
             try:
-                resp = requests.get(download_url, timeout=30)
-                if resp.status_code == 200:
-                    raw_bytes = resp.content
-                    detected_type = detect_file_type(raw_bytes)
-                    
-                    if detected_type == '.pdf':
-                        render_pdf_content(raw_bytes, filename, unique_key=f"gh_magic_{abs(hash(download_url))}")
-                    elif detected_type in IMAGE_EXTENSIONS:
-                        render_image_content(raw_bytes, caption=filename)
-                    elif detected_type in ['.docx', '.doc']:
-                        render_docx_viewer(raw_bytes, filename, unique_key=f"gh_magic_{abs(hash(download_url))}")
-                    elif detected_type in ['.zip']:
-                        st.info("📦 Detected ZIP archive - download to view contents")
-                        st.markdown(f"[📥 Download {filename}]({download_url})")
-                    elif detected_type == '.txt':
-                        # Detected as text - display as code
-                        text_content = raw_bytes.decode('utf-8', errors='ignore')
-                        st.code(text_content[:50000], language=None)
+                # Stream so only the header is downloaded unless the detected type needs the body
+                with _gh_session().get(download_url, timeout=30, stream=True) as resp:
+                    if resp.status_code == 200:
+                        head = resp.raw.read(MAGIC_SNIFF_BYTES, decode_content=True)
+                        detected_type = detect_file_type(head)
+                        
+                        if detected_type == '.pdf':
+                            raw_bytes = head + resp.raw.read(decode_content=True)
+                            render_pdf_content(raw_bytes, filename, unique_key=f"gh_magic_{abs(hash(download_url))}")
+                        elif detected_type in IMAGE_EXTENSIONS:
+                            raw_bytes = head + resp.raw.read(decode_content=True)
+                            render_image_content(raw_bytes, caption=filename)
+                        elif detected_type in ['.docx', '.doc']:
+                            raw_bytes = head + resp.raw.read(decode_content=True)
+                            render_docx_viewer(raw_bytes, filename, unique_key=f"gh_magic_{abs(hash(download_url))}")
+                        elif detected_type in ['.zip']:
+                            st.info("📦 Detected ZIP archive - download to view contents")
+                            st.markdown(f"[📥 Download {filename}]({download_url})")
+                        elif detected_type == '.txt':
+                            # Detected as text - display as code (50k chars fit in 200k UTF-8 bytes)
+                            raw_bytes = head + resp.raw.read(200000 - len(head), decode_content=True)
+                            text_content = raw_bytes.decode('utf-8', errors='ignore')
+                            st.code(text_content[:50000], language=None)
+                        else:
+                            # Unknown binary
+                            st.info(f"📦 Binary file ({file_type}) - download to view")
+                            st.markdown(f"[📥 Download {filename}]({download_url})")
                     else:
-                        # Unknown binary
-                        st.info(f"📦 Binary file ({file_type}) - download to view")
+                        st.warning(f"Could not fetch file (HTTP {resp.status_code})")
                         st.markdown(f"[📥 Download {filename}]({download_url})")
-                else:
-                    st.warning(f"Could not fetch file (HTTP {resp.status_code})")
-                    st.markdown(f"[📥 Download {filename}]({download_url})")
             except Exception as e:
                 logger.debug(f"Magic byte detection failed: {e}")
                 # Fallback to original behavior
-                if content and not content.isprintable():
+                if content and _looks_binary(content):
                     st.info(f"📦 Binary file ({file_type}) - download to view")
                     st.markdown(f"[📥 Download {filename}]({download_url})")
                 else:
                     st.code(content, language=None)
         else:
             # No download URL - use original printability check
-            if content and not content.isprintable():
+            if content and _looks_binary(content):
                 st.info(f"📦 Binary file ({file_type}) - download to view")
             else:
                 st.code(content, language=None)
 
 
+# Deletion tables for the download-path sanitizer (ASCII fast path). They must
+# keep exactly what core.api keeps when saving downloads: alphanumerics plus a
+# few punctuation characters.
+_ASCII_NON_ALNUM = "".join(chr(c) for c in range(128) if not chr(c).isalnum())
+_STUDENT_NAME_TABLE = str.maketrans("", "", _ASCII_NON_ALNUM.translate(str.maketrans("", "", " -_")))
+_FILE_NAME_TABLE = str.maketrans("", "", _ASCII_NON_ALNUM.translate(str.maketrans("", "", " -_.")))
+
+
+def _sanitize_path_part(value: str, table: dict, keep: str) -> str:
+    """Strip characters that are not alphanumeric or in ``keep``, like the download code does."""
+    if value.isascii():
+        return value.translate(table).strip()
+    # Non-ASCII names keep Unicode alphanumerics, so use the general filter
+    return "".join([c for c in value if c.isalnum() or c in keep]).strip()
+
+
+def safe_student_dirname(name: str) -> str:
+    """Student folder name as used for downloaded submissions."""
+    return _sanitize_path_part(name, _STUDENT_NAME_TABLE, ' -_')
+
+
+def safe_download_filename(filename: str) -> str:
+    """Submission file name as saved to the downloads folder."""
+    return _sanitize_path_part(filename, _FILE_NAME_TABLE, ' -_.')
+
+
 def render_submission_content(row: Dict[str, Any], course_id: int):
     """
     Smart content viewer that detects submission type and renders appropriate viewer.
     """
-    import ast
-    
     submission_text = row.get("Submission", "")
     submission_type = row.get("Submission_Type", "")
     submission_files = row.get("Submission_Files", [])
     
     # Parse submission files if string
     if isinstance(submission_files, str) and submission_files.startswith('['):
+        # JSON lists parse in C; Python reprs (e.g. lists of tuples from CSV)
+        # fail on the first character and fall back to literal_eval
         try:
-            submission_files = ast.literal_eval(submission_files)
-        except:
-            submission_files = []
+            submission_files = json.loads(submission_files)
+        except ValueError:
+            try:
+                submission_files = ast.literal_eval(submission_files)
+            except Exception:
+                submission_files = []
     
     # Determine type if not set
     if not submission_type:
         if submission_files:
             submission_type = "file"
-        elif "http" in submission_text.lower():
+        elif _URL_RE.search(submission_text):
             submission_type = "link"
         elif submission_text.strip():
             submission_type = "text"
@@ -1753,54 +2481,68 @@ def render_submission_content(row: Dict[str, Any], course_id: int):
             fname = f[0] if isinstance(f, (list, tuple)) else str(f)
             
             # Check if downloaded locally
-            safe_student = "".join([c for c in row.get('Name', 'Unknown') if c.isalnum() or c in (' ', '-', '_')]).strip()
-            safe_filename = "".join([c for c in fname if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+            safe_student = safe_student_dirname(row.get('Name', 'Unknown'))
+            safe_filename = safe_download_filename(fname)
             local_path = Path(f"output/course_{course_id}/downloads/{safe_student}/{safe_filename}")
+            # Deterministic widget-key suffix: builtin hash() of a str is salted per process
+            path_key = f"{zlib.crc32(str(local_path).encode()):08x}"
             
-            if local_path.exists():
-                ext = local_path.suffix.lower()
+            # One stat() call covers the existence check, size and cache key
+            try:
+                file_stat = os.stat(local_path)
+            except FileNotFoundError:
+                st.info(f"📂 {fname} - not downloaded yet")
+                continue
+            ext = local_path.suffix.lower()
+            file_size = file_stat.st_size
+            
+            if ext == '.pdf':
+                # Show only extracted text content (file info is already shown above)
+                text_content = _cached_pdf_text(str(local_path), file_stat.st_mtime_ns, file_size)
                 
-                if ext == '.pdf':
-                    # Show only extracted text content (file info is already shown above)
-                    from core.ai import extract_pdf_text
-                    text_content = extract_pdf_text(str(local_path))
-                    
-                    if text_content.startswith("(") and text_content.endswith(")"):
-                        st.warning(text_content)
-                    else:
-                        st.text_area(
-                            "📝 Extracted Content",
-                            value=text_content,
-                            height=400,
-                            key=f"pdf_content_{hash(str(local_path))}",
-                            disabled=True
-                        )
-                elif ext in IMAGE_EXTENSIONS:
-                    render_image_content(str(local_path), caption=fname)
-                elif ext in LANGUAGE_MAP or ext in ['.txt', '.log', '.csv']:
-                    file_size = local_path.stat().st_size
-                    if file_size > get_max_inline_size():
-                        st.warning(f"⚠️ {fname} is too large ({file_size / 1024:.1f}KB)")
-                        with open(local_path, "rb") as file:
-                            st.download_button(f"📥 Download {fname}", file, fname)
+                if text_content.startswith("(") and text_content.endswith(")"):
+                    st.warning(text_content)
+                else:
+                    truncated = len(text_content) > PDF_TEXT_PREVIEW_CHARS
+                    st.text_area(
+                        "📝 Extracted Content",
+                        value=text_content[:PDF_TEXT_PREVIEW_CHARS] if truncated else text_content,
+                        height=400,
+                        key=f"pdf_content_{path_key}",
+                        disabled=True
+                    )
+                    if truncated:
+                        st.caption(f"Showing the first {PDF_TEXT_PREVIEW_CHARS:,} of {len(text_content):,} characters")
+                        # Served from Streamlit's media store rather than the rerun delta
+                        st.download_button("📥 Download full text", text_content.encode('utf-8'),
+                                           f"{local_path.stem}.txt", mime="text/plain",
+                                           key=f"pdf_text_dl_{path_key}")
+            elif ext in IMAGE_EXTENSIONS:
+                render_image_content(str(local_path), caption=fname)
+            elif ext in LANGUAGE_MAP or ext in ['.txt', '.log', '.csv']:
+                if file_size > get_max_inline_size():
+                    st.warning(f"⚠️ {fname} is too large ({file_size / 1024:.1f}KB)")
+                    _file_download_button(f"📥 Download {fname}", local_path, file_stat, fname)
+                else:
+                    # Size already checked against the inline limit, so one full read is safe
+                    content = _cached_text_file(str(local_path), file_stat.st_mtime_ns, file_size)
+                    if content is None:
+                        st.markdown(f"**{fname}** (Binary file)")
+                        _file_download_button(f"📥 Download {fname}", local_path, file_stat, fname,
+                                              key=f"dl_sub_{path_key}")
                     else:
-                        with open(local_path, 'r', encoding='utf-8', errors='ignore') as file:
-                            content = file.read()
                         st.markdown(f"**{fname}**")
                         render_code_content(content, fname)
-                else:
-                    st.markdown(f"**{fname}** (Binary file)")
-                    with open(local_path, "rb") as file:
-                        st.download_button(f"📥 Download {fname}", file, fname, key=f"dl_{fname}")
             else:
-                st.info(f"📂 {fname} - not downloaded yet")
+                st.markdown(f"**{fname}** (Binary file)")
+                _file_download_button(f"📥 Download {fname}", local_path, file_stat, fname,
+                                      key=f"dl_sub_{path_key}")
     
     elif submission_type == "link":
         # Link submission
-        import re
-        url_match = re.search(r'(https?://[^\s]+)', submission_text)
+        url_match = _URL_RE.search(submission_text)
         if url_match:
-            url = url_match.group(1)
+            url = url_match.group(0)
             
             if "github.com" in url:
                 pat = get_config("github_pat")
@@ -1,7 +1,8 @@
+import re
+
 import streamlit as st
 
-def apply_custom_css():
-    st.markdown("""
+_CUSTOM_CSS = """
     <style>
         .main-header {
             font-size: 2.5rem;
@@ -14,23 +15,15 @@ def apply_custom_css():
             color: #666;
             margin-bottom: 2rem;
         }
-        .stale-badge {
-            padding: 0.25rem 0.75rem;
-            border-radius: 1rem;
-            background-color: #f0f2f6;
-            color: #666;
-            font-size: 0.85rem;
-            display: inline-block;
-            margin-bottom: 1rem;
-        }
-        .fresh-badge {
-            padding: 0.25rem 0.75rem;
-            border-radius: 1rem;
-            background-color: #d4edda;
-            color: #155724;
-            font-size: 0.85rem;
-            display: inline-block;
-            margin-bottom: 1rem;
-        }
     </style>
-    """, unsafe_allow_html=True)
+"""
+
+# Whitespace collapsed once at import, so each rerun sends (and the markdown
+# renderer parses) a single compact line
+_CUSTOM_CSS_MIN = re.sub(r"\s+", " ", _CUSTOM_CSS).strip()
+
+
+def apply_custom_css():
+    # Emitted on every run on purpose: elements not re-sent in a rerun are
+    # removed from the page, so gating this per session would drop the styles
+    st.markdown(_CUSTOM_CSS_MIN, unsafe_allow_html=True)
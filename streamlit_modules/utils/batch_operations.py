@@ -6,9 +6,15 @@ found in the original shiny_app.py (lines 1683-1856)
 """
 from shiny import ui
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
+# Progress is pushed to the client at most ~100 times per batch, and no more
+# often than this many seconds apart (the final update is always sent)
+PROGRESS_MIN_INTERVAL = 0.05
+
 
 class BatchOperationExecutor:
     """
@@ -32,7 +38,17 @@ class BatchOperationExecutor:
         self.operation_name = operation_name
         self.progress_message = progress_message
 
-    def execute(self, indices, items, processor_func):
+    def _process_one(self, items, idx, processor_func):
+        """Run processor_func on one item; returns True on success."""
+        try:
+            if idx < len(items):
+                return bool(processor_func(items[idx], idx))
+            logger.warning(f"{self.operation_name}: Invalid index {idx}")
+        except Exception as e:
+            logger.error(f"Error in {self.operation_name} at index {idx}: {e}")
+        return False
+
+    def execute(self, indices, items, processor_func, parallel=1, mutated=None):
         """
         Execute batch operation on selected items
 
@@ -41,32 +57,54 @@ class BatchOperationExecutor:
             items: List of items to operate on
             processor_func: Function(item, index) -> bool
                           Returns True on success, False on failure
+            parallel: Number of worker threads. Values above 1 run
+                      processor_func concurrently (useful for I/O-bound
+                      work such as Moodle requests), so it must be
+                      thread-safe and must not depend on processing order.
+                      Only mutate the item it is given.
+            mutated: Optional set that receives the indices processed
+                     successfully, i.e. the items changed in place. Callers
+                     can skip publishing/saving the list when it stays empty.
 
         Returns:
             tuple: (success_count, error_count)
         """
         success_count = 0
         error_count = 0
+        total = len(indices)
+        update_every = max(1, total // 100)
+        last_update = time.monotonic()
 
-        with ui.Progress(min=0, max=len(indices)) as p:
+        with ui.Progress(min=0, max=total) as p:
             p.set(message=self.progress_message)
 
-            for i, idx in enumerate(indices):
-                try:
-                    if idx < len(items):
-                        result = processor_func(items[idx], idx)
-                        if result:
-                            success_count += 1
-                        else:
-                            error_count += 1
+            if parallel > 1:
+                pool = ThreadPoolExecutor(max_workers=parallel)
+                futures = {pool.submit(self._process_one, items, idx, processor_func): idx for idx in indices}
+                results = ((futures[f], f.result()) for f in as_completed(futures))
+            else:
+                pool = None
+                results = ((idx, self._process_one(items, idx, processor_func)) for idx in indices)
+
+            try:
+                for i, (idx, ok) in enumerate(results):
+                    if ok:
+                        success_count += 1
+                        if mutated is not None:
+                            mutated.add(idx)
                     else:
-                        logger.warning(f"{self.operation_name}: Invalid index {idx}")
                         error_count += 1
-                except Exception as e:
-                    logger.error(f"Error in {self.operation_name} at index {idx}: {e}")
-                    error_count += 1
 
-                p.set(i + 1)
+                    done = i + 1
+                    now = time.monotonic()
+                    if done == total or (done % update_every == 0
+                                         and now - last_update >= PROGRESS_MIN_INTERVAL):
+                        p.set(done)
+                        last_update = now
+            finally:
+                if pool is not None:
+                    # Drop queued calls that have not started if the loop above raised
+                    pool.shutdown(wait=True, cancel_futures=True)
 
         logger.info(
             f"{self.operation_name} completed: "
@@ -116,6 +154,8 @@ def do_add_group_batch():
     group_id = input.batch_group_id()
     if not group_id: return
 
+    # One shallow copy per batch: reactive.Value.set() ignores the same object,
+    # so a fresh list is what invalidates dependents (exactly once, below)
     current = list(topics_list())
     s = setup_session(user_session_id())
 
@@ -124,12 +164,17 @@ def do_add_group_batch():
         topic['group_restriction_summary'] = f"Group: {group_id}"
         return True
 
+    changed = set()
     executor = BatchOperationExecutor("Add Group", "Adding group restriction...")
-    success, errors = executor.execute(indices, current, add_group_to_topic)
+    success, errors = executor.execute(indices, current, add_group_to_topic, mutated=changed)
 
-    if success > 0:
+    if changed:
         topics_list.set(current)
         save_cache(f"course_{cid}_topics", current)
         trigger_background_refresh(cid)
         ui.notification_show(f"Added group to {success} topics", type="message")
+
+# Batches that only act on the server and leave the rows untouched can pass
+# topics_list() directly and skip both the copy and the set():
+#     executor.execute(indices, topics_list(), clear_groups_on_server)
 """